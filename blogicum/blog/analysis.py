@@ -0,0 +1,59 @@
+import re
+import threading
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+WORD_RE = re.compile(r'\w+')
+
+# Distinct words whose stems are remembered; post text follows Zipf's
+# law, so most words of a new post are already here.
+STEM_CACHE_SIZE = 100_000
+
+
+class Analyzer:
+    """Turns text into the terms stored in and looked up in the index.
+
+    The base class only lowercases words. The same analyzer must be used
+    for indexing and for queries, see BLOG_SEARCH_ANALYZER.
+    """
+
+    def normalize(self, words):
+        return [word.lower() for word in words]
+
+    def analyze(self, text):
+        """Return the normalized words of text joined by spaces."""
+        return ' '.join(self.normalize(WORD_RE.findall(text)))
+
+
+class RussianAnalyzer(Analyzer):
+    """Reduces Russian words to their Snowball stem.
+
+    'Праздники', 'праздника' and 'праздник' all become 'праздник' and 'ё'
+    is folded to 'е'. Words in other scripts are only lowercased.
+    """
+
+    def __init__(self):
+        # Snowball stemmers keep state between calls: one per thread.
+        self._local = threading.local()
+        self._stem = lru_cache(maxsize=STEM_CACHE_SIZE)(self._stem_word)
+
+    def _stem_word(self, word):
+        stemmer = getattr(self._local, 'stemmer', None)
+        if stemmer is None:
+            stemmer = self._local.stemmer = snowballstemmer.stemmer('russian')
+        return stemmer.stemWord(word)
+
+    def normalize(self, words):
+        return [self._stem(word.lower()) for word in words]
+
+
+@lru_cache(maxsize=None)
+def _load_analyzer(path):
+    return import_string(path)()
+
+
+def get_analyzer():
+    return _load_analyzer(settings.BLOG_SEARCH_ANALYZER)
@@ -0,0 +1,222 @@
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.utils.http import urlencode
+from django.views.decorators.csrf import csrf_exempt
+
+from .models import Category, Comment, Post
+from .paginators import CursorPaginator, InvalidCursor
+from .scheduling import publish_due_posts_if_needed
+from .views import filter_posts
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+User = get_user_model()
+
+# Field names of the API mapped to values() lookups. Rows are serialized
+# straight from values(), so only the columns asked for with ?fields= are
+# read and no model instances are built.
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'location': 'location__name',
+    'comment_count': 'comment_count',
+    'image': 'image',
+}
+# Lists leave out the text unless it is asked for.
+POST_LIST_FIELDS = tuple(name for name in POST_FIELDS if name != 'text')
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created_at': 'created_at',
+}
+
+CATEGORY_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+}
+
+PROFILE_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'date_joined': 'date_joined',
+    'post_count': 'post_count',
+}
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _json(data, status=200):
+    # Cyrillic stays as is: half the bytes of \u escapes.
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def api_view(view):
+    """Serve view to GET only and turn ApiError into a JSON error.
+
+    The API is read-only, so it is exempt from CSRF checks: other methods
+    get a JSON 405 instead of the HTML 403 of CsrfViewMiddleware.
+    """
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = _json({'detail': 'Метод не поддерживается.'}, 405)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        publish_due_posts_if_needed()
+        try:
+            return _json(view(request, *args, **kwargs))
+        except ApiError as error:
+            return _json({'detail': error.detail}, error.status)
+    return wrapper
+
+
+def _requested_fields(request, available, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return tuple(default)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(400, 'Неизвестные поля: {}.'.format(', '.join(unknown)))
+    return ('id', *dict.fromkeys(name for name in names if name != 'id'))
+
+
+def _image_url(name):
+    return Post._meta.get_field('image').storage.url(name) if name else None
+
+
+# Applied to the values() lookups that are not JSON-ready as they are.
+CONVERTERS = {'image': _image_url}
+
+
+def _serialize(row, available, fields):
+    data = {name: row[available[name]] for name in fields}
+    for name in fields:
+        convert = CONVERTERS.get(available[name])
+        if convert is not None:
+            data[name] = convert(data[name])
+    return data
+
+
+def _detail(queryset, request, available):
+    fields = _requested_fields(request, available, available)
+    row = queryset.values(*{available[name] for name in fields}).first()
+    if row is None:
+        raise ApiError(404, 'Не найдено.')
+    return _serialize(row, available, fields)
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit должен быть числом.')
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(
+        f'{request.path}?{urlencode(params, doseq=True)}'
+    )
+
+
+def _list(request, queryset, available, default, order_field,
+          descending=True):
+    """One keyset page of queryset as {'results', 'next', 'previous'}."""
+    fields = _requested_fields(request, available, default)
+    lookups = {available[name] for name in fields} | {'id', order_field}
+    paginator = CursorPaginator(
+        queryset.values(*lookups), _page_size(request),
+        order_field=order_field, descending=descending,
+    )
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise ApiError(400, 'Неверный cursor.')
+    return {
+        'results': [_serialize(row, available, fields) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    }
+
+
+@api_view
+def post_list(request):
+    posts = filter_posts(Post.objects.all())
+    if 'category' in request.GET:
+        posts = posts.filter(category__slug=request.GET['category'])
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    return _list(request, posts, POST_FIELDS, POST_LIST_FIELDS, 'pub_date')
+
+
+@api_view
+def post_detail(request, post_id):
+    return _detail(
+        filter_posts(Post.objects.filter(pk=post_id)), request, POST_FIELDS
+    )
+
+
+@api_view
+def comment_list(request, post_id):
+    if not filter_posts(Post.objects.filter(pk=post_id)).exists():
+        raise ApiError(404, 'Не найдено.')
+    return _list(
+        request, Comment.objects.filter(post_id=post_id), COMMENT_FIELDS,
+        COMMENT_FIELDS, 'created_at', descending=False,
+    )
+
+
+@api_view
+def category_list(request):
+    return _list(
+        request, Category.objects.filter(is_published=True),
+        CATEGORY_FIELDS, CATEGORY_FIELDS, 'created_at', descending=False,
+    )
+
+
+@api_view
+def category_detail(request, category_slug):
+    return _detail(
+        Category.objects.filter(slug=category_slug, is_published=True),
+        request, CATEGORY_FIELDS,
+    )
+
+
+@api_view
+def profile_detail(request, username):
+    return _detail(
+        User.objects.filter(username=username).annotate(
+            post_count=Count('post', filter=Q(post__is_visible=True))
+        ),
+        request, PROFILE_FIELDS,
+    )
@@ -0,0 +1,271 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .models import Post
+from .scheduling import publish_due_posts_if_needed
+
+CARD_GENERATION_KEY = 'blog:card:generation'
+
+
+def _version_key(kind, pk):
+    return f'blog:card:{kind}:{pk}'
+
+
+def _card_version_keys(post):
+    return (
+        CARD_GENERATION_KEY,
+        _version_key('post', post.pk),
+        _version_key('category', post.category_id),
+        _version_key('location', post.location_id),
+        _version_key('user', post.author_id),
+    )
+
+
+def _new_version():
+    # Seeded from the clock so that a version lost to eviction never
+    # reuses a number an older fragment may still be cached under.
+    return time.time_ns()
+
+
+def bump_card_version(kind, pk):
+    key = _version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def bump_card_generation():
+    try:
+        cache.incr(CARD_GENERATION_KEY)
+    except ValueError:
+        cache.set(CARD_GENERATION_KEY, _new_version(), None)
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def attach_card_versions(posts):
+    """Set post.card_version, the fragment cache key of includes/post_card.
+
+    Versions of every post, category, location and author on the page are
+    fetched with a single get_many().
+    """
+    posts = list(posts)
+    versions = _get_versions(
+        {key for post in posts for key in _card_version_keys(post)}
+    )
+    for post in posts:
+        post.card_version = '.'.join(
+            str(versions[key]) for key in _card_version_keys(post)
+        )
+    return posts
+
+
+FEED_PAGE_TIMEOUT = 60 * 60
+FEED_GENERATION_KEY = 'blog:feed:generation'
+PAGE_CACHE_HITS_KEY = 'blog:page_cache:hits'
+PAGE_CACHE_MISSES_KEY = 'blog:page_cache:misses'
+
+
+def _feed_version_key(feed):
+    return f'blog:feed:{feed}'
+
+
+def bump_feed_versions(feeds):
+    for key in map(_feed_version_key, feeds):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def bump_feed_generation():
+    try:
+        cache.incr(FEED_GENERATION_KEY)
+    except ValueError:
+        cache.set(FEED_GENERATION_KEY, _new_version(), None)
+
+
+def _feed_version_keys(feed):
+    # Pages embed post cards, so card-wide bumps (recounts, thumbnails)
+    # must change them too.
+    return (
+        FEED_GENERATION_KEY, CARD_GENERATION_KEY, _feed_version_key(feed)
+    )
+
+
+def _digest(version_keys, parts):
+    versions = _get_versions(version_keys)
+    raw_key = '|'.join(
+        (*(str(versions[key]) for key in version_keys), *map(str, parts))
+    )
+    return hashlib.md5(raw_key.encode()).hexdigest()
+
+
+def feed_cache_key(prefix, feed, *parts):
+    """Build a cache key that changes whenever the feed is bumped."""
+    return f'blog:{prefix}:' + _digest(_feed_version_keys(feed), parts)
+
+
+def post_feed_state(post_id):
+    return Post.objects.filter(pk=post_id).values(
+        'is_visible', 'category__slug', 'author_id'
+    ).first()
+
+
+def invalidate_post_feeds(*states):
+    """Bump the feeds a post was or is now visible in.
+
+    Each state is a post_feed_state() snapshot, None for a missing row.
+    """
+    feeds = set()
+    for state in states:
+        if state:
+            # The author sees hidden posts on their profile too.
+            feeds.add(f"author:{state['author_id']}")
+        if state and state['is_visible']:
+            feeds.update(('index', f"category:{state['category__slug']}"))
+    bump_feed_versions(feeds)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_page_cache_stats():
+    """Read the hit and miss counters all server processes add to."""
+    stats = cache.get_many((PAGE_CACHE_HITS_KEY, PAGE_CACHE_MISSES_KEY))
+    return {
+        'hits': stats.get(PAGE_CACHE_HITS_KEY, 0),
+        'misses': stats.get(PAGE_CACHE_MISSES_KEY, 0),
+    }
+
+
+def reset_page_cache_stats():
+    cache.delete_many((PAGE_CACHE_HITS_KEY, PAGE_CACHE_MISSES_KEY))
+
+
+def cache_anonymous_feed(feed):
+    """Cache whole responses of a feed view for anonymous visitors.
+
+    feed is formatted with the view kwargs, e.g. 'category:{category_slug}';
+    the page is keyed on the feed version plus path, page and cursor.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            publish_due_posts_if_needed()
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = feed_cache_key(
+                'page',
+                feed.format(**kwargs),
+                request.path,
+                request.GET.get('page', ''),
+                request.GET.get('cursor', ''),
+            )
+            response = cache.get(key)
+            if response is not None:
+                _count(PAGE_CACHE_HITS_KEY)
+                response['X-Cache'] = 'HIT'
+                return response
+            _count(PAGE_CACHE_MISSES_KEY)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, response, FEED_PAGE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def _client_parts(request):
+    # Pages differ per user and embed the CSRF token into their forms.
+    return (
+        request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    )
+
+
+def feed_etag(feed):
+    """Build an etag_func for django.views.decorators.http.condition.
+
+    The ETag changes together with the feed_cache_key() of the feed, so a
+    repeat visit gets 304 Not Modified until the feed is bumped.
+    """
+    def etag(request, **kwargs):
+        publish_due_posts_if_needed()
+        return _digest(
+            _feed_version_keys(feed.format(**kwargs)),
+            (request.get_full_path(), *_client_parts(request)),
+        )
+    return etag
+
+
+def profile_etag(request, username):
+    author_id = get_user_model().objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if author_id is None:
+        return None
+    return feed_etag(f'author:{author_id}')(request)
+
+
+def _post_page_state(request, post_id):
+    # Shared by post_etag() and post_last_modified() within one request.
+    if getattr(request, '_post_page_state', None) is None:
+        publish_due_posts_if_needed()
+        state = Post.objects.filter(pk=post_id).values(
+            'updated_at', 'is_visible', 'author_id', 'category_id',
+            'location_id'
+        ).first()
+        if state is not None and not state['is_visible'] and (
+            request.user.pk != state['author_id']
+        ):
+            state = None
+        request._post_page_state = (post_id, state)
+    cached_post_id, state = request._post_page_state
+    return state if cached_post_id == post_id else None
+
+
+def post_etag(request, post_id):
+    """etag_func for the pages of a single post and its comments.
+
+    updated_at moves on every edit of the post or its comments; the card
+    versions cover the category, location and author shown with it.
+    """
+    state = _post_page_state(request, post_id)
+    if state is None:
+        return None
+    return _digest(
+        (
+            CARD_GENERATION_KEY,
+            _version_key('post', post_id),
+            _version_key('category', state['category_id']),
+            _version_key('location', state['location_id']),
+            _version_key('user', state['author_id']),
+        ),
+        (
+            state['updated_at'].isoformat(), request.get_full_path(),
+            *_client_parts(request),
+        ),
+    )
+
+
+def post_last_modified(request, post_id):
+    state = _post_page_state(request, post_id)
+    return state and state['updated_at']
@@ -0,0 +1,246 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from faker.providers.lorem.ru_RU import Provider as LoremProvider
+
+from .caching import bump_card_generation, bump_feed_generation
+from .dumps import explicit_timestamps, reset_sequences
+from .models import Category, Comment, Location, Post
+from .scheduling import reset_schedule
+from .search import index_posts
+
+User = get_user_model()
+
+# Posts per tier; the other tables are sized from it in dataset_sizes().
+TIERS = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# Posts are dated back over this span, most of them recently.
+PUB_DATE_SPAN = timedelta(days=5 * 365)
+PUB_DATE_SKEW = 3
+# Posts dated up to SCHEDULE_SPAN ahead, waiting for blog.scheduling.
+SCHEDULED_FRACTION = 0.02
+SCHEDULE_SPAN = timedelta(days=30)
+UNPUBLISHED_FRACTION = 0.05
+UNPUBLISHED_CATEGORY_FRACTION = 0.05
+NO_LOCATION_FRACTION = 0.3
+
+# Comments per post follow a Pareto law: most posts have none or a few,
+# some have hundreds. The mean is just under
+# COMMENT_ALPHA / (COMMENT_ALPHA - 1) - 1.
+COMMENT_ALPHA = 1.5
+MAX_COMMENTS = 2000
+
+TEXT_WORDS = (20, 200)
+TITLE_WORDS = (2, 6)
+
+
+def dataset_sizes(posts):
+    return {
+        'users': max(100, posts // 20),
+        'categories': max(10, posts // 10_000),
+        'locations': max(20, posts // 2_000),
+        'posts': posts,
+    }
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class DatasetGenerator:
+    """Fill the database with a deterministic synthetic blog.
+
+    The same seed and sizes give the same rows; dates are relative to the
+    midnight before the run. New rows get primary keys after the existing
+    ones, so a generator can run on a non-empty database.
+    """
+
+    def __init__(self, sizes, seed=0, batch_size=5000, password=None,
+                 index=True):
+        self.sizes = sizes
+        self.batch_size = batch_size
+        self.index = index
+        self.rng = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.now = timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        # One hash for everybody: hashing is slow by design.
+        self.password = (
+            make_password(password, salt=f'dataset{seed}') if password
+            else UNUSABLE_PASSWORD_PREFIX
+        )
+        self.counts = dict.fromkeys(('users', 'categories', 'locations',
+                                     'posts', 'comments'), 0)
+        self.words = LoremProvider.word_list
+        # Zipf's law: the n-th most frequent word is n times rarer.
+        self.word_weights = list(accumulate(
+            1 / rank for rank in range(1, len(self.words) + 1)
+        ))
+
+    def _words(self, bounds):
+        return self.rng.choices(
+            self.words, cum_weights=self.word_weights,
+            k=self.rng.randint(*bounds),
+        )
+
+    def _title(self):
+        return ' '.join(self._words(TITLE_WORDS)).capitalize()
+
+    def _text(self):
+        return ' '.join(self._words(TEXT_WORDS)).capitalize() + '.'
+
+    def _pub_date(self):
+        if self.rng.random() < SCHEDULED_FRACTION:
+            return self.now + SCHEDULE_SPAN * self.rng.random()
+        return self.now - PUB_DATE_SPAN * self.rng.random() ** PUB_DATE_SKEW
+
+    def _create(self, model, objects, key):
+        with transaction.atomic():
+            model.objects.bulk_create(objects)
+        self.counts[key] += len(objects)
+
+    def _generate_users(self):
+        first_pk = _next_pk(User)
+        users = []
+        for pk in range(first_pk, first_pk + self.sizes['users']):
+            users.append(User(
+                pk=pk,
+                username=f'user{pk}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=self.password,
+                date_joined=self.now - PUB_DATE_SPAN * self.rng.random(),
+            ))
+            if len(users) == self.batch_size:
+                self._create(User, users, 'users')
+                users = []
+        if users:
+            self._create(User, users, 'users')
+        return list(range(first_pk, first_pk + self.sizes['users']))
+
+    def _generate_categories(self):
+        first_pk = _next_pk(Category)
+        categories = [
+            Category(
+                pk=pk,
+                title=self._title(),
+                description=self._text(),
+                slug=f'category-{pk}',
+                is_published=(
+                    self.rng.random() >= UNPUBLISHED_CATEGORY_FRACTION
+                ),
+                created_at=self.now - PUB_DATE_SPAN,
+            )
+            for pk in range(first_pk, first_pk + self.sizes['categories'])
+        ]
+        self._create(Category, categories, 'categories')
+        return {category.pk: category.is_published for category in categories}
+
+    def _generate_locations(self):
+        first_pk = _next_pk(Location)
+        locations = [
+            Location(
+                pk=pk, name=self.faker.city(),
+                created_at=self.now - PUB_DATE_SPAN,
+            )
+            for pk in range(first_pk, first_pk + self.sizes['locations'])
+        ]
+        self._create(Location, locations, 'locations')
+        return [location.pk for location in locations]
+
+    def _comment_count(self):
+        count = int(self.rng.paretovariate(COMMENT_ALPHA)) - 1
+        return min(count, MAX_COMMENTS)
+
+    def _flush_posts(self, posts, comments):
+        with transaction.atomic():
+            Post.objects.bulk_create(posts)
+            Comment.objects.bulk_create(comments)
+            if self.index:
+                index_posts(posts)
+        self.counts['posts'] += len(posts)
+        self.counts['comments'] += len(comments)
+
+    def _generate_posts(self, user_ids, categories, location_ids):
+        category_ids = list(categories)
+        # A few prolific authors write most of the posts.
+        author_weights = list(accumulate(
+            1 / rank for rank in range(1, len(user_ids) + 1)
+        ))
+        post_pk, comment_pk = _next_pk(Post), _next_pk(Comment)
+        posts, comments = [], []
+        for pk in range(post_pk, post_pk + self.sizes['posts']):
+            pub_date = self._pub_date()
+            category_id = self.rng.choice(category_ids)
+            is_published = self.rng.random() >= UNPUBLISHED_FRACTION
+            comment_count = (
+                self._comment_count() if pub_date <= self.now else 0
+            )
+            posts.append(Post(
+                pk=pk,
+                title=self._title(),
+                text=self._text(),
+                pub_date=pub_date,
+                created_at=min(pub_date, self.now),
+                updated_at=min(pub_date, self.now),
+                author_id=self.rng.choices(
+                    user_ids, cum_weights=author_weights
+                )[0],
+                category_id=category_id,
+                location_id=(
+                    None if self.rng.random() < NO_LOCATION_FRACTION
+                    else self.rng.choice(location_ids)
+                ),
+                is_published=is_published,
+                is_visible=(
+                    is_published and pub_date <= self.now
+                    and categories[category_id]
+                ),
+                comment_count=comment_count,
+            ))
+            for _ in range(comment_count):
+                comments.append(Comment(
+                    pk=comment_pk,
+                    post_id=pk,
+                    author_id=self.rng.choice(user_ids),
+                    text=' '.join(self._words(TITLE_WORDS)),
+                    created_at=min(
+                        pub_date + timedelta(
+                            hours=self.rng.expovariate(1 / 48)
+                        ),
+                        self.now,
+                    ),
+                ))
+                comment_pk += 1
+            if len(posts) == self.batch_size:
+                self._flush_posts(posts, comments)
+                posts, comments = [], []
+        if posts:
+            self._flush_posts(posts, comments)
+
+    def generate(self):
+        """Create all rows; return the number created per table."""
+        with explicit_timestamps(User, Category, Location, Post, Comment):
+            user_ids = self._generate_users()
+            categories = self._generate_categories()
+            location_ids = self._generate_locations()
+            self._generate_posts(user_ids, categories, location_ids)
+        reset_sequences((User, Category, Location, Post, Comment))
+        bump_card_generation()
+        bump_feed_generation()
+        reset_schedule()
+        return self.counts
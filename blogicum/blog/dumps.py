@@ -0,0 +1,317 @@
+import gzip
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import groupby, islice
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.serializers.python import Deserializer
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import bump_card_generation, bump_feed_generation
+from .models import Category, Comment, Post
+from .scheduling import reset_schedule
+from .search import index_posts
+
+# Models a dump may hold, in the order they depend on each other.
+DUMP_MODELS = (
+    settings.AUTH_USER_MODEL.lower(),
+    'blog.category',
+    'blog.location',
+    'blog.post',
+    'blog.comment',
+)
+
+# JSON Lines, one object per line, or the JSON array of dumpdata.
+DUMP_FORMATS = ('jsonl', 'json')
+
+READ_SIZE = 1 << 16
+WHITESPACE_RE = re.compile(r'[\s,]*')
+# Level 9, the gzip default, is twice as slow for a few percent.
+GZIP_LEVEL = 6
+
+
+def open_dump(path, mode='rt'):
+    """Open a dump file, gzip-compressed when its name ends with .gz."""
+    if str(path).endswith('.gz'):
+        return gzip.open(
+            path, mode, compresslevel=GZIP_LEVEL, encoding='utf-8'
+        )
+    return open(path, mode, encoding='utf-8')
+
+
+def reset_sequences(models):
+    """Move primary key sequences past rows inserted with explicit pks."""
+    sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+    if sequence_sql:
+        with connection.cursor() as cursor:
+            for sql in sequence_sql:
+                cursor.execute(sql)
+
+
+def auto_timestamp_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Keep the dates set on instances of models through bulk_create().
+
+    auto_now and auto_now_add fields would otherwise be stamped with the
+    current time. Not thread-safe: meant for management commands.
+    """
+    fields = [
+        field for model in models for field in auto_timestamp_fields(model)
+    ]
+    flags = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, flags):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def dump_filename(label, dump_format, compress=False):
+    return f'{label}.{dump_format}' + ('.gz' if compress else '')
+
+
+def dump_files(directory):
+    """Files of an export_blog_dump directory, in DUMP_MODELS order."""
+    files = []
+    for name in os.listdir(directory):
+        label = name.split('.json')[0]
+        if label in DUMP_MODELS:
+            files.append((DUMP_MODELS.index(label), name))
+    return [os.path.join(directory, name) for _, name in sorted(files)]
+
+
+def _m2m_values(field, pks):
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    related = defaultdict(list)
+    for pk, value in through.objects.filter(**{f'{source}__in': pks}).order_by(
+        'pk'
+    ).values_list(f'{source}_id', f'{target}_id'):
+        related[pk].append(value)
+    return related
+
+
+def iter_model_objects(label, chunk_size=2000):
+    """Yield every row of the model as a dumpdata-style dict.
+
+    Rows are read with values_list().iterator(), never as model instances;
+    many-to-many values are fetched with one query per chunk.
+    """
+    model = apps.get_model(label)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    names = [field.name for field in fields]
+    m2m_fields = model._meta.many_to_many
+    rows = model._default_manager.order_by('pk').values_list(
+        'pk', *(field.attname for field in fields)
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        pks = [row[0] for row in chunk]
+        related = {
+            field.name: _m2m_values(field, pks) for field in m2m_fields
+        }
+        for pk, *values in chunk:
+            data = dict(zip(names, values))
+            for name, values_by_pk in related.items():
+                data[name] = values_by_pk.get(pk, [])
+            yield {'model': label, 'pk': pk, 'fields': data}
+
+
+def export_model(label, path, dump_format='jsonl', chunk_size=2000):
+    """Write all rows of the model to path; return (label, rows, secs).
+
+    Runs in a pool process of the export_blog_dump command.
+    """
+    started = time.monotonic()
+    encode = DjangoJSONEncoder(ensure_ascii=False).encode
+    count = 0
+    with open_dump(path, 'wt') as file:
+        if dump_format == 'json':
+            file.write('[')
+        for obj in iter_model_objects(label, chunk_size):
+            if dump_format == 'json':
+                file.write(',\n' if count else '\n')
+                file.write(encode(obj))
+            else:
+                file.write(encode(obj) + '\n')
+            count += 1
+        if dump_format == 'json':
+            file.write('\n]\n')
+    return label, count, time.monotonic() - started
+
+
+def iter_dump_objects(stream, read_size=READ_SIZE):
+    """Yield the objects of a JSON array or JSON Lines dump one by one.
+
+    stream is read read_size characters at a time, so memory use does not
+    grow with the size of the dump, only with the size of one object.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, array = '', 0, False, None
+    while True:
+        pos = WHITESPACE_RE.match(buffer, pos).end()
+        if array is None and pos < len(buffer):
+            array = buffer[pos] == '['
+            if array:
+                pos += 1
+                continue
+        if array and buffer.startswith(']', pos):
+            return
+        if pos < len(buffer):
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield obj
+                continue
+        elif eof:
+            return
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+class Importer:
+    """bulk_create() the objects of a dump in batches, one transaction each.
+
+    Model.save() and signals are skipped, so the importer fills in what
+    they would: Post.is_visible, Post.comment_count and the search index.
+    Dates are kept as dumped; objects dumped without them get the import
+    time, as auto_now_add would have given.
+    """
+
+    def __init__(self, batch_size=1000, ignore_conflicts=False):
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.counts = dict.fromkeys(DUMP_MODELS, 0)
+        self.skipped = 0
+        self.commented_post_ids = set()
+        self.now = timezone.now()
+        self.models = [apps.get_model(label) for label in DUMP_MODELS]
+        self._timestamp_fields = {
+            model: auto_timestamp_fields(model) for model in self.models
+        }
+        self._published_categories = dict(
+            Category.objects.values_list('pk', 'is_published')
+        )
+
+    def _category_published(self, category_id):
+        # Categories are normally dumped before their posts.
+        published = self._published_categories
+        if category_id not in published:
+            published[category_id] = Category.objects.filter(
+                pk=category_id, is_published=True
+            ).exists()
+        return published[category_id]
+
+    def _prepare(self, obj):
+        for field in self._timestamp_fields[type(obj)]:
+            if getattr(obj, field.attname) is None:
+                setattr(obj, field.attname, self.now)
+        if isinstance(obj, Category):
+            self._published_categories[obj.pk] = obj.is_published
+        elif isinstance(obj, Post):
+            obj.is_visible = bool(
+                obj.is_published
+                and obj.pub_date <= self.now
+                and obj.category_id is not None
+                and self._category_published(obj.category_id)
+            )
+        elif isinstance(obj, Comment):
+            self.commented_post_ids.add(obj.post_id)
+
+    def _save_m2m(self, deserialized):
+        through_rows = {}
+        for item in deserialized:
+            for name, values in item.m2m_data.items():
+                field = item.object._meta.get_field(name)
+                through = field.remote_field.through
+                through_rows.setdefault(through, []).extend(
+                    through(**{
+                        f'{field.m2m_field_name()}_id': item.object.pk,
+                        f'{field.m2m_reverse_field_name()}_id': value,
+                    })
+                    for value in values
+                )
+        for through, rows in through_rows.items():
+            through.objects.bulk_create(
+                rows, ignore_conflicts=self.ignore_conflicts
+            )
+
+    def _flush(self, label, deserialized):
+        objects = [item.object for item in deserialized]
+        for obj in objects:
+            self._prepare(obj)
+        model = type(objects[0])
+        with transaction.atomic():
+            model.objects.bulk_create(
+                objects, ignore_conflicts=self.ignore_conflicts
+            )
+            self._save_m2m(deserialized)
+            if model is Post and self.ignore_conflicts:
+                # Skipped rows keep what the database had, not the dump.
+                index_posts(Post.objects.filter(
+                    pk__in=[obj.pk for obj in objects]
+                ).only('title', 'text'))
+            elif model is Post:
+                index_posts(objects)
+        self.counts[label] += len(objects)
+
+    def load(self, objects):
+        """Import the dicts of objects; return {model label: rows}."""
+        with explicit_timestamps(*self.models):
+            for label, group in groupby(
+                objects, key=lambda obj: obj['model']
+            ):
+                if label not in self.counts:
+                    self.skipped += sum(1 for _ in group)
+                    continue
+                batch = []
+                for item in Deserializer(group):
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        self._flush(label, batch)
+                        batch = []
+                if batch:
+                    self._flush(label, batch)
+        return self.counts
+
+    def finish(self):
+        """Recount comments, reset sequences and drop cached pages."""
+        post_ids = sorted(self.commented_post_ids)
+        for start in range(0, len(post_ids), self.batch_size):
+            with transaction.atomic():
+                Post.objects.filter(
+                    pk__in=post_ids[start:start + self.batch_size]
+                ).recount_comments()
+        reset_sequences(self.models)
+        bump_card_generation()
+        bump_feed_generation()
+        reset_schedule()
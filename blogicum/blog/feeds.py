@@ -0,0 +1,163 @@
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models.functions import Substr
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe, quote_etag
+from django.utils.text import Truncator
+
+from .caching import FEED_PAGE_TIMEOUT, feed_cache_key
+from .models import Category, Post
+from .scheduling import publish_due_posts_if_needed
+from .views import filter_posts, sort_posts
+
+FEED_ITEMS = 20
+FEED_SUMMARY_LENGTH = 300
+
+User = get_user_model()
+
+
+class PostsFeed(Feed):
+    """RSS 2.0 feed of the newest visible posts.
+
+    Items are values() rows with only the columns the feed shows and the
+    first FEED_SUMMARY_LENGTH characters of the text. Whole responses are
+    cached under the version of the blog feed they mirror, so they live
+    until a post in that feed changes, and carry an ETag; Last-Modified is
+    the newest pub_date or updated_at among the items.
+    """
+
+    title = 'Блогикум: новые публикации'
+    description = 'Последние публикации всех авторов.'
+
+    def feed_name(self, **kwargs):
+        return 'index'
+
+    def __call__(self, request, *args, **kwargs):
+        publish_due_posts_if_needed()
+        feed = self.feed_name(**kwargs)
+        if feed is None:
+            raise Http404
+        key = feed_cache_key('syndication', feed, request.path)
+        response = cache.get(key)
+        if response is None:
+            response = super().__call__(request, *args, **kwargs)
+            response['ETag'] = quote_etag(key.rsplit(':', 1)[-1])
+            cache.set(key, response, FEED_PAGE_TIMEOUT)
+        return get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')
+            ),
+            response=response,
+        )
+
+    def link(self, obj):
+        return reverse('blog:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return sort_posts(filter_posts(self.posts(obj))).annotate(
+            summary=Substr('text', 1, FEED_SUMMARY_LENGTH + 1)
+        ).values(
+            'pk', 'title', 'summary', 'pub_date', 'updated_at',
+            'author__username', 'category__title',
+        )[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item['title']
+
+    def item_description(self, item):
+        return Truncator(item['summary']).chars(FEED_SUMMARY_LENGTH)
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', args=(item['pk'],))
+
+    def item_pubdate(self, item):
+        return item['pub_date']
+
+    def item_updateddate(self, item):
+        return item['updated_at']
+
+    def item_author_name(self, item):
+        return item['author__username']
+
+    def item_categories(self, item):
+        return (item['category__title'],) if item['category__title'] else ()
+
+
+class CategoryPostsFeed(PostsFeed):
+
+    def feed_name(self, category_slug):
+        return f'category:{category_slug}'
+
+    def get_object(self, request, category_slug):
+        return get_object_or_404(
+            Category.objects.only('title', 'slug', 'description'),
+            slug=category_slug,
+            is_published=True,
+        )
+
+    def title(self, obj):
+        return f'Блогикум: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('blog:category_posts', args=(obj.slug,))
+
+    def posts(self, obj):
+        return Post.objects.filter(category=obj)
+
+
+class AuthorPostsFeed(PostsFeed):
+
+    def feed_name(self, username):
+        author_id = User.objects.filter(username=username).values_list(
+            'pk', flat=True
+        ).first()
+        return None if author_id is None else f'author:{author_id}'
+
+    def get_object(self, request, username):
+        return get_object_or_404(
+            User.objects.only('username'), username=username
+        )
+
+    def title(self, obj):
+        return f'Блогикум: публикации {obj.username}'
+
+    def description(self, obj):
+        return f'Последние публикации пользователя {obj.username}.'
+
+    def link(self, obj):
+        return reverse('blog:profile', args=(obj.username,))
+
+    def posts(self, obj):
+        return Post.objects.filter(author=obj)
+
+
+class PostsAtomFeed(PostsFeed):
+    feed_type = Atom1Feed
+    subtitle = PostsFeed.description
+
+
+class CategoryPostsAtomFeed(CategoryPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return obj.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
@@ -0,0 +1,196 @@
+import math
+import posixpath
+import re
+from collections import namedtuple
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps, features
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+except ImportError:
+    pillow_avif = None
+
+# Bounding boxes of the derivatives; the aspect ratio is preserved.
+DERIVATIVE_SIZES = {
+    'thumb': (640, 640),
+    'medium': (1280, 1280),
+}
+
+# EXIF orientations that rotate the picture by 90 or 270 degrees.
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Widths of the srcset candidates; smaller originals also get a copy at
+# their own width so that every image is offered in MODERN_FORMATS.
+RESPONSIVE_WIDTHS = (320, 640, 960, 1280)
+
+# Formats offered through <picture> sources, best compression first.
+MODERN_FORMATS = tuple(
+    image_format for image_format, available in (
+        ('AVIF', pillow_avif is not None),
+        ('WEBP', features.check('webp')),
+    ) if available
+)
+FORMAT_EXTENSIONS = {'AVIF': '.avif', 'WEBP': '.webp'}
+FORMAT_MIME_TYPES = {'AVIF': 'image/avif', 'WEBP': 'image/webp'}
+ENCODE_OPTIONS = {
+    'AVIF': {'quality': 60},
+    'WEBP': {'quality': 80},
+}
+
+DERIVATIVE_SUFFIX_RE = re.compile(
+    r'_(?:{}|w\d+)$'.format('|'.join(DERIVATIVE_SIZES))
+)
+
+ImageVariant = namedtuple(
+    'ImageVariant', 'url width height srcset sources', defaults=('', ())
+)
+
+
+def derivative_name(name, size):
+    root, ext = posixpath.splitext(name)
+    return f'{root}_{size}{ext}'
+
+
+def derivative_url(image, size):
+    return image.storage.url(derivative_name(image.name, size))
+
+
+def derivative_root(name):
+    """Name of the original, without extension, name may be resized from."""
+    return DERIVATIVE_SUFFIX_RE.sub('', posixpath.splitext(name)[0])
+
+
+def responsive_widths(width):
+    widths = [
+        candidate for candidate in RESPONSIVE_WIDTHS if candidate < width
+    ]
+    if width <= RESPONSIVE_WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def responsive_name(name, width, image_format=None):
+    root, ext = posixpath.splitext(name)
+    if image_format is not None:
+        ext = FORMAT_EXTENSIONS[image_format]
+    return f'{root}_w{width}{ext}'
+
+
+def responsive_srcset(image, widths, image_format=None):
+    urls = (
+        image.storage.url(responsive_name(image.name, width, image_format))
+        for width in widths
+    )
+    return ', '.join(
+        f'{url} {width}w' for url, width in zip(urls, widths)
+    )
+
+
+def read_image_info(file):
+    """Return the displayed width and height and the byte size of file.
+
+    Only the image header is parsed; EXIF rotation is applied the same
+    way generate_derivatives() applies it.
+    """
+    file.seek(0)
+    with Image.open(file) as img:
+        width, height = img.size
+        orientation = img.getexif().get(ExifTags.Base.Orientation)
+    if orientation in ROTATED_ORIENTATIONS:
+        width, height = height, width
+    file.seek(0)
+    return {'width': width, 'height': height, 'size': file.size}
+
+
+def scaled_size(width, height, box):
+    """Size of a width x height image after Image.thumbnail(box)."""
+    x, y = box
+    if x >= width and y >= height:
+        return width, height
+
+    def round_aspect(number, key):
+        return max(min(math.floor(number), math.ceil(number), key=key), 1)
+
+    aspect = width / height
+    if x / y >= aspect:
+        x = round_aspect(y * aspect, key=lambda n: abs(aspect - n / y))
+    else:
+        y = round_aspect(
+            x / aspect, key=lambda n: 0 if n == 0 else abs(aspect - x / n)
+        )
+    return x, y
+
+
+def derivative_names(name, variants=None):
+    """Names of the resized copies generate_derivatives() wrote for name."""
+    names = [derivative_name(name, size) for size in DERIVATIVE_SIZES]
+    for width in (variants or {}).get('widths', ()):
+        names.append(responsive_name(name, width))
+        names.extend(
+            responsive_name(name, width, image_format)
+            for image_format in variants['formats']
+        )
+    return names
+
+
+def _encode(img, image_format):
+    if image_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = BytesIO()
+    img.save(
+        buffer, format=image_format,
+        **ENCODE_OPTIONS.get(image_format, {'optimize': True, 'quality': 85})
+    )
+    return buffer.getvalue()
+
+
+def _replace(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save_as(name, ContentFile(content))
+
+
+def generate_derivatives(name, storage):
+    """Write the resized versions of name next to the original.
+
+    storage is the ContentAddressedStorage of Post.image.
+
+    These are the DERIVATIVE_SIZES boxes plus a copy per responsive width
+    in the original format and in every MODERN_FORMATS. Returns the
+    widths and formats written, to be kept in Post.image_meta.
+
+    Touches only the storage, never the database, so it is safe to run in
+    a worker process.
+    """
+    with storage.open(name) as source:
+        original = Image.open(source)
+        image_format = original.format
+        original = ImageOps.exif_transpose(original)
+        original.load()
+    for size, box in DERIVATIVE_SIZES.items():
+        resized = original.copy()
+        resized.thumbnail(box, Image.Resampling.LANCZOS)
+        _replace(
+            storage, derivative_name(name, size),
+            _encode(resized, image_format)
+        )
+    widths = responsive_widths(original.width)
+    formats = [
+        modern_format for modern_format in MODERN_FORMATS
+        if modern_format != image_format
+    ]
+    for width in widths:
+        resized = original.copy()
+        resized.thumbnail((width, original.height), Image.Resampling.LANCZOS)
+        _replace(
+            storage, responsive_name(name, width),
+            _encode(resized, image_format)
+        )
+        for modern_format in formats:
+            _replace(
+                storage, responsive_name(name, width, modern_format),
+                _encode(resized, modern_format)
+            )
+    return {'widths': widths, 'formats': formats}
@@ -0,0 +1,96 @@
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import bump_card_version, invalidate_post_feeds, post_feed_state
+from .images import generate_derivatives
+from .models import ImageJob, Post
+
+MAX_ATTEMPTS = 3
+# A failed job is retried after RETRY_DELAY seconds, doubled per attempt,
+# so that a storage hiccup has time to pass.
+RETRY_DELAY = 30
+
+
+def claim_image_jobs(limit):
+    """Atomically take up to limit pending jobs due for this worker."""
+    claim = uuid.uuid4().hex
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = list(
+            ImageJob.objects.filter(
+                Q(retry_after__isnull=True) | Q(retry_after__lte=now),
+                status=ImageJob.PENDING,
+            ).order_by('created_at').values_list('pk', flat=True)[:limit]
+        )
+        ImageJob.objects.filter(
+            pk__in=job_ids, status=ImageJob.PENDING
+        ).update(
+            status=ImageJob.RUNNING,
+            claim=claim,
+            attempts=F('attempts') + 1,
+            updated_at=timezone.now(),
+        )
+    return list(ImageJob.objects.filter(claim=claim, status=ImageJob.RUNNING))
+
+
+def requeue_stale_image_jobs(older_than):
+    """Return jobs left running by a crashed worker to the queue."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=older_than),
+    ).update(status=ImageJob.PENDING, claim='')
+
+
+def process_image(name):
+    # Runs in a pool process: decode, resize and re-encode only.
+    return generate_derivatives(name, Post.image.field.storage)
+
+
+def mark_derivatives_ready(post_id, image, variants):
+    """Record variants of image unless the post has a newer image now."""
+    post = Post.objects.filter(pk=post_id, image=image).only(
+        'image_meta'
+    ).first()
+    if post is None:
+        return False
+    return bool(Post.objects.filter(pk=post_id, image=image).update(
+        derivatives_image=image,
+        image_meta={**post.image_meta, 'variants': variants},
+    ))
+
+
+def finish_image_job(job, error=None, variants=None):
+    if error is not None:
+        job.status = (
+            ImageJob.FAILED if job.attempts >= MAX_ATTEMPTS
+            else ImageJob.PENDING
+        )
+        job.error = str(error)
+        job.claim = ''
+        if job.status == ImageJob.PENDING:
+            job.retry_after = timezone.now() + timedelta(
+                seconds=RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        job.save(update_fields=(
+            'status', 'error', 'claim', 'retry_after', 'updated_at'
+        ))
+        return
+    job.status = ImageJob.DONE
+    job.error = ''
+    job.save(update_fields=('status', 'error', 'updated_at'))
+    if mark_derivatives_ready(job.post_id, job.image, variants):
+        bump_card_version('post', job.post_id)
+        invalidate_post_feeds(post_feed_state(job.post_id))
+
+
+def run_image_job(job):
+    try:
+        variants = process_image(job.image)
+    except (OSError, ValueError) as error:
+        finish_image_job(job, error)
+    else:
+        finish_image_job(job, variants=variants)
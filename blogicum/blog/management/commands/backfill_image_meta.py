@@ -0,0 +1,67 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from blog.caching import bump_card_generation, bump_feed_generation
+from blog.images import read_image_info
+from blog.models import Post
+
+
+def _read(name):
+    try:
+        with Post.image.field.storage.open(name) as file:
+            return name, read_image_info(file), None
+    except (OSError, ValueError) as error:
+        return name, None, error
+
+
+class Command(BaseCommand):
+    help = ('Сохраняет размеры и вес уже загруженных изображений '
+            'публикаций.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=min(32, (os.cpu_count() or 1) * 4),
+            help='Число потоков чтения файлов.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько публикаций обновлять за один запрос.'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перечитать и те изображения, сведения о которых уже есть.'
+        )
+
+    def handle(self, *args, workers, batch_size, force, **options):
+        posts = Post.objects.exclude(image='')
+        if not force:
+            posts = posts.filter(image_meta={})
+        posts = posts.only('image').iterator(chunk_size=batch_size)
+        updated = failed = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(workers) as pool:
+            while batch := list(islice(posts, batch_size)):
+                names = [post.image.name for post in batch]
+                infos = {}
+                for name, info, error in pool.map(_read, names):
+                    if error is None:
+                        infos[name] = info
+                    else:
+                        failed += 1
+                        self.stderr.write(f'{name}: {error}')
+                for post in batch:
+                    post.image_meta = infos.get(post.image.name)
+                batch = [post for post in batch if post.image_meta]
+                Post.objects.bulk_update(batch, ('image_meta',))
+                updated += len(batch)
+        bump_card_generation()
+        bump_feed_generation()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Обновлено: {updated}, ошибок: {failed} '
+            f'за {elapsed:.1f} с'
+        )
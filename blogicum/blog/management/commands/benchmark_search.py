@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from blog.models import Post
+from blog.search import search_paginator
+from blog.views import POSTS_PER_PAGE, filter_posts, sort_posts
+
+
+def _best(fetch, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(fetch())
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время первой страницы поиска по индексу FTS5 и '
+            'наивного поиска через icontains.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='+', help='Поисковые запросы.')
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз выполнить каждый запрос.'
+        )
+
+    def handle(self, *args, queries, repeat, **options):
+        self.stdout.write(
+            f'{connection.vendor}: {Post.objects.count()} публикаций'
+        )
+        visible = filter_posts(Post.objects.all())
+        for query in queries:
+            fts = search_paginator(visible, query, POSTS_PER_PAGE)
+            naive = sort_posts(visible.filter(
+                Q(title__icontains=query) | Q(text__icontains=query)
+            ))
+            self.stdout.write(self.style.MIGRATE_HEADING(query))
+            self.stdout.write(
+                'FTS5: {:.2f} мс, icontains: {:.2f} мс'.format(
+                    _best(lambda: fts.page(None), repeat),
+                    _best(lambda: naive[:POSTS_PER_PAGE].all(), repeat),
+                )
+            )
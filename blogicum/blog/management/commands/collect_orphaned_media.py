@@ -0,0 +1,147 @@
+import os
+import posixpath
+import shutil
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.images import derivative_root
+from blog.models import ImageJob, Post
+
+# Extensions an original may have before the scan has come across it.
+COMMON_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def _scan(path):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из хранилища изображения, на которые не ссылается '
+            'ни одна публикация, вместе с их уменьшенными копиями.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только подсчитать лишние файлы, ничего не удаляя.'
+        )
+        parser.add_argument(
+            '--quarantine', metavar='DIR',
+            help='Переносить лишние файлы в каталог вместо удаления.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько файлов удалять за один проход.'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=60 * 60,
+            help='Не трогать файлы моложе, сек: их публикация может быть '
+                 'ещё не сохранена.'
+        )
+
+    def handle(self, *args, dry_run, quarantine, batch_size, min_age,
+               **options):
+        field = Post._meta.get_field('image')
+        self.storage = field.storage
+        self.dry_run = dry_run
+        self.quarantine = quarantine
+        self.verbosity = options['verbosity']
+        started = time.monotonic()
+        # Names without extension: derivatives are matched through
+        # derivative_root(), so only originals need to be kept in memory.
+        referenced = {
+            posixpath.splitext(name)[0]
+            for name in Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).iterator(chunk_size=batch_size)
+        }
+        self.stdout.write(
+            f'Изображений в базе: {len(referenced)} '
+            f'({time.monotonic() - started:.1f} с)'
+        )
+        top = self.storage.path(field.upload_to)
+        cutoff = time.time() - min_age
+        self.extensions = set(COMMON_EXTENSIONS)
+        scanned = collected = freed = 0
+        batch = []
+        for entry in _scan(top) if os.path.isdir(top) else ():
+            scanned += 1
+            name = os.path.relpath(entry.path, self.storage.location).replace(
+                os.sep, '/'
+            )
+            self.extensions.add(posixpath.splitext(name)[1])
+            if (
+                posixpath.splitext(name)[0] in referenced
+                or derivative_root(name) in referenced
+            ):
+                continue
+            stat = entry.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            batch.append((name, stat.st_size))
+            if len(batch) >= batch_size:
+                count, size = self._collect(batch)
+                collected += count
+                freed += size
+                batch = []
+        count, size = self._collect(batch)
+        collected += count
+        freed += size
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            '{}: {}, освобождено {:.1f} МБ; просмотрено файлов: {} '
+            'за {:.1f} с ({:.0f} файлов/с)'.format(
+                'Найдено лишних' if dry_run else 'Убрано лишних',
+                collected, freed / 2**20, scanned, elapsed,
+                scanned / elapsed if elapsed else 0,
+            )
+        )
+
+    def _taken_roots(self, names):
+        """Roots of names a post or an image job has taken since the scan.
+
+        A re-upload of an identical image reuses the stored file without
+        touching its mtime, so --min-age alone does not protect it.
+        """
+        roots = {derivative_root(name) for name in names}
+        candidates = [
+            root + ext for root in roots for ext in self.extensions
+        ]
+        taken = set()
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            taken.update(Post.objects.filter(image__in=chunk).values_list(
+                'image', flat=True
+            ))
+            taken.update(ImageJob.objects.filter(
+                image__in=chunk,
+                status__in=(ImageJob.PENDING, ImageJob.RUNNING),
+            ).values_list('image', flat=True))
+        return {posixpath.splitext(name)[0] for name in taken}
+
+    def _collect(self, batch):
+        """Remove the files of batch; return their count and total size."""
+        taken = self._taken_roots([name for name, _ in batch])
+        batch = [
+            (name, size) for name, size in batch
+            if derivative_root(name) not in taken
+        ]
+        for name, _ in batch:
+            if self.verbosity >= 2:
+                self.stdout.write(name)
+            if self.dry_run:
+                continue
+            if self.quarantine:
+                target = os.path.join(self.quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(self.storage.path(name), target)
+            else:
+                self.storage.delete(name)
+        if batch and not self.dry_run:
+            self.stdout.write(f'... {len(batch)} файлов')
+        return len(batch), sum(size for _, size in batch)
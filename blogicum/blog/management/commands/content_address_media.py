@@ -0,0 +1,116 @@
+import posixpath
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.caching import bump_card_generation, bump_feed_generation
+from blog.images import (
+    DERIVATIVE_SUFFIX_RE, FORMAT_EXTENSIONS, derivative_names
+)
+from blog.models import ImageJob, Post
+
+
+class Command(BaseCommand):
+    help = ('Переносит загруженные ранее изображения публикаций в '
+            'хранилище с именами по хешу содержимого.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько имён файлов выбирать из базы за один запрос.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет перенесено.'
+        )
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        self.storage = Post._meta.get_field('image').storage
+        self._listings = {}
+        moved = deduplicated = failed = 0
+        last = ''
+        while True:
+            names = list(
+                Post.objects.exclude(image='').filter(image__gt=last).
+                order_by('image').values_list('image', flat=True).
+                distinct()[:batch_size]
+            )
+            if not names:
+                break
+            last = names[-1]
+            for name in names:
+                if self.storage.is_content_name(name):
+                    continue
+                try:
+                    new_name, existed = self._move(name, dry_run)
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                deduplicated += existed
+                moved += not existed
+                if dry_run:
+                    self.stdout.write(f'{name} -> {new_name}')
+        if not dry_run:
+            bump_card_generation()
+            bump_feed_generation()
+        self.stdout.write(
+            f'Перенесено: {moved}, совпало с уже загруженными: '
+            f'{deduplicated}, ошибок: {failed}'
+        )
+
+    def _move(self, name, dry_run):
+        with self.storage.open(name) as content:
+            new_name = self.storage.content_name(name, content)
+            existed = self.storage.exists(new_name)
+            if dry_run:
+                return new_name, existed
+            if not existed:
+                self.storage.save(name, content)
+        old_derivatives, new_derivatives = self._derivatives(name, new_name)
+        for old, new in zip(old_derivatives, new_derivatives):
+            if self.storage.exists(old) and not self.storage.exists(new):
+                with self.storage.open(old) as derivative:
+                    self.storage.save_as(new, derivative)
+        with transaction.atomic():
+            Post.objects.filter(image=name).update(image=new_name)
+            Post.objects.filter(derivatives_image=name).update(
+                derivatives_image=new_name
+            )
+            ImageJob.objects.filter(image=name).update(image=new_name)
+        for old in (name, *old_derivatives):
+            self.storage.delete(old)
+        return new_name, existed
+
+    def _derivatives(self, name, new_name):
+        """Names of the resized copies of name and what they become."""
+        meta = Post.objects.filter(derivatives_image=name).values_list(
+            'image_meta', flat=True
+        ).first()
+        variants = meta and meta.get('variants')
+        if variants:
+            return (
+                derivative_names(name, variants),
+                derivative_names(new_name, variants),
+            )
+        # Without image_meta the responsive widths are unknown: look for
+        # files named after the original instead.
+        directory = posixpath.dirname(name)
+        if directory not in self._listings:
+            self._listings[directory] = self.storage.listdir(directory)[1]
+        root, ext = posixpath.splitext(name)
+        new_root = posixpath.splitext(new_name)[0]
+        old_derivatives = []
+        for filename in self._listings[directory]:
+            derivative = posixpath.join(directory, filename)
+            derivative_root, derivative_ext = posixpath.splitext(derivative)
+            suffix = derivative_root[len(root):]
+            if (
+                derivative_root.startswith(root)
+                and DERIVATIVE_SUFFIX_RE.fullmatch(suffix)
+                and derivative_ext in (ext, *FORMAT_EXTENSIONS.values())
+            ):
+                old_derivatives.append(derivative)
+        return old_derivatives, [
+            new_root + derivative[len(root):] for derivative in old_derivatives
+        ]
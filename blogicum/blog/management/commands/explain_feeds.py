@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from blog.models import Category, Post
+from blog.views import (
+    POSTS_PER_PAGE, filter_posts, profile_posts, select_post_relations,
+    sort_posts
+)
+
+
+def feed_querysets():
+    """Yield the unsorted post list of each feed, built as its view does."""
+    yield 'index', filter_posts(select_post_relations(Post.objects))
+    category = Category.objects.filter(is_published=True).first()
+    if category is not None:
+        yield 'category_posts', filter_posts(
+            select_post_relations(Post.objects).filter(category=category)
+        )
+    author_id = Post.objects.values_list('author_id', flat=True).first()
+    if author_id is not None:
+        yield 'profile', profile_posts(author_id, is_owner=False)
+
+
+class Command(BaseCommand):
+    help = ('Выводит план выполнения (EXPLAIN QUERY PLAN) и время выборки '
+            'первой страницы для каждой ленты публикаций.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз выполнить запрос для замера времени.'
+        )
+
+    def handle(self, *args, repeat, **options):
+        self.stdout.write(
+            f'{connection.vendor}: {Post.objects.count()} публикаций'
+        )
+        for name, queryset in feed_querysets():
+            queryset = sort_posts(queryset)[:POSTS_PER_PAGE]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain())
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f'лучшее время: {min(timings) * 1000:.2f} мс'
+            )
@@ -0,0 +1,74 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.dumps import DUMP_FORMATS, DUMP_MODELS, dump_filename, export_model
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, категории, местоположения, публикации '
+            'и комментарии в каталог, по файлу на модель, не собирая '
+            'выгрузку в памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Каталог для файлов выгрузки.')
+        parser.add_argument(
+            '--format', choices=DUMP_FORMATS, default='jsonl',
+            dest='dump_format',
+            help='jsonl — объект на строку, json — массив, как у dumpdata.'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', dest='compress',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--models', nargs='+', choices=DUMP_MODELS, default=DUMP_MODELS,
+            help='Какие модели выгружать.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за один запрос.'
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            default=min(len(DUMP_MODELS), os.cpu_count() or 1),
+            help='Число процессов, по модели на процесс; 0 — выгружать '
+                 'в текущем процессе.'
+        )
+
+    def handle(self, *args, output, dump_format, compress, models,
+               chunk_size, workers, **options):
+        os.makedirs(output, exist_ok=True)
+        tasks = [
+            (
+                label,
+                os.path.join(
+                    output, dump_filename(label, dump_format, compress)
+                ),
+                dump_format,
+                chunk_size,
+            )
+            for label in models
+        ]
+        started = time.monotonic()
+        if workers:
+            # Forked workers must not share the parent's connection.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                workers, initializer=django.setup
+            ) as pool:
+                results = list(pool.map(export_model, *zip(*tasks)))
+        else:
+            results = [export_model(*task) for task in tasks]
+        elapsed = time.monotonic() - started
+        for label, count, seconds in results:
+            self.stdout.write(f'{label}: {count} за {seconds:.1f} с')
+        total = sum(count for _, count, _ in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.images import derivative_name, responsive_name
+from blog.models import Post
+from blog.views import POSTS_PER_PAGE, filter_posts, sort_posts
+
+# Mirrors sizes="(max-width: 40rem) 100vw, 38rem" of includes/post_image.
+SLOT_BREAKPOINT = 640
+SLOT_WIDTH = 608
+
+
+def _viewport(value):
+    try:
+        width, dpr = value.lower().split('x')
+        return int(width), float(dpr)
+    except ValueError:
+        raise CommandError(f'Ожидается ШИРИНАxDPR, например 360x2: {value}')
+
+
+def _pick(widths, needed):
+    """The srcset candidate a browser takes for needed device pixels."""
+    return next((width for width in widths if width >= needed), widths[-1])
+
+
+def _src_name(post):
+    # The file behind post.image_thumb.url, all the card served before srcset.
+    if post.image_derivatives_ready:
+        return derivative_name(post.image.name, 'thumb')
+    return post.image.name
+
+
+class Command(BaseCommand):
+    help = ('Считает объём изображений на страницах главной ленты: '
+            'только src и с учётом srcset/WebP для разных экранов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=1,
+            help='Сколько первых страниц ленты учесть.'
+        )
+        parser.add_argument(
+            '--viewport', action='append', type=_viewport,
+            help='Экран в виде ШИРИНАxDPR; можно указать несколько раз.'
+        )
+
+    def handle(self, *args, pages, viewport, **options):
+        viewports = viewport or [(360, 2.0), (412, 2.625), (1280, 1.0)]
+        posts = [
+            post for post in sort_posts(filter_posts(
+                Post.objects.only('image', 'derivatives_image', 'image_meta')
+            ))[:POSTS_PER_PAGE * pages]
+            if post.image
+        ]
+        if not posts:
+            raise CommandError('В ленте нет публикаций с изображениями.')
+        storage = posts[0].image.storage
+        src_bytes = sum(storage.size(_src_name(post)) for post in posts)
+        self.stdout.write(
+            f'Страниц: {pages}, изображений: {len(posts)}\n'
+            f'только src: {src_bytes / 1024:.1f} КБ'
+        )
+        for width, dpr in viewports:
+            slot = width if width <= SLOT_BREAKPOINT else SLOT_WIDTH
+            total = 0
+            for post in posts:
+                variants = post.image_meta.get('variants')
+                if not post.image_derivatives_ready or not variants:
+                    total += storage.size(_src_name(post))
+                    continue
+                formats = variants['formats'] or [None]
+                total += storage.size(responsive_name(
+                    post.image.name,
+                    _pick(variants['widths'], slot * dpr),
+                    formats[0],
+                ))
+            self.stdout.write(
+                f'{width}x{dpr:g}: {total / 1024:.1f} КБ '
+                f'({total / src_bytes:.0%} от src)'
+            )
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.dataset import TIERS, DatasetGenerator, dataset_sizes
+
+
+class Command(BaseCommand):
+    help = ('Создаёт синтетические данные для нагрузочного тестирования: '
+            'пользователей, категории, местоположения, публикации и '
+            'комментарии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tier', choices=TIERS, default='10k',
+            help='Число публикаций; остальное рассчитывается от него.'
+        )
+        parser.add_argument(
+            '--posts', type=int,
+            help='Точное число публикаций вместо --tier.'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько публикаций сохранять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--password',
+            help='Общий пароль пользователей; без него войти нельзя.'
+        )
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Не индексировать публикации для поиска; потом нужен '
+                 'rebuild_search_index.'
+        )
+
+    def handle(self, *args, tier, posts, seed, batch_size, password,
+               skip_search_index, **options):
+        sizes = dataset_sizes(posts if posts is not None else TIERS[tier])
+        generator = DatasetGenerator(
+            sizes, seed, batch_size, password, index=not skip_search_index
+        )
+        started = time.monotonic()
+        counts = generator.generate()
+        elapsed = time.monotonic() - started
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано строк: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
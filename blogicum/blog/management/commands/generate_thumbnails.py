@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from blog.caching import bump_card_generation, bump_feed_generation
+from blog.images import generate_derivatives
+from blog.jobs import mark_derivatives_ready
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений уже сохранённых публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии, даже если они уже есть.'
+        )
+
+    def handle(self, *args, force, **options):
+        generated = failed = 0
+        posts = Post.objects.exclude(image='').only(
+            'image', 'derivatives_image', 'image_meta'
+        ).iterator()
+        for post in posts:
+            if (
+                not force and post.image_derivatives_ready
+                and 'variants' in post.image_meta
+            ):
+                continue
+            try:
+                variants = generate_derivatives(
+                    post.image.name, post.image.storage
+                )
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'{post.image.name}: {error}')
+            else:
+                mark_derivatives_ready(post.pk, post.image.name, variants)
+                generated += 1
+        bump_card_generation()
+        bump_feed_generation()
+        self.stdout.write(
+            f'Обработано изображений: {generated}, ошибок: {failed}'
+        )
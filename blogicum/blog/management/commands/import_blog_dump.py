@@ -0,0 +1,59 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import IntegrityError
+
+from blog.dumps import Importer, dump_files, iter_dump_objects, open_dump
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, категории, местоположения, публикации '
+            'и комментарии из дампа в формате db.json или JSON Lines '
+            '(.gz — сжатого), не читая его в память целиком.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help='Файлы дампа или каталоги, созданные export_blog_dump.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов сохранять за одну транзакцию.'
+        )
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать объекты, чей первичный ключ уже занят.'
+        )
+
+    def handle(self, *args, paths, batch_size, ignore_conflicts,
+               **options):
+        importer = Importer(batch_size, ignore_conflicts)
+        started = time.monotonic()
+        paths = [
+            file for path in paths
+            for file in (dump_files(path) if os.path.isdir(path) else [path])
+        ]
+        for path in paths:
+            try:
+                with open_dump(path) as stream:
+                    importer.load(iter_dump_objects(stream))
+            except (
+                OSError, ValueError, DeserializationError, IntegrityError
+            ) as error:
+                # Batches loaded before the error stay committed.
+                raise CommandError(f'{path}: {error}')
+        importer.finish()
+        elapsed = time.monotonic() - started
+        total = sum(importer.counts.values())
+        for label, count in importer.counts.items():
+            self.stdout.write(f'{label}: {count}')
+        if importer.skipped:
+            self.stdout.write(
+                f'Пропущено объектов других моделей: {importer.skipped}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
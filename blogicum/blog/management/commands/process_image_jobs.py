@@ -0,0 +1,84 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+
+from blog.jobs import (
+    claim_image_jobs, finish_image_job, process_image,
+    requeue_stale_image_jobs, run_image_job
+)
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает очередь изображений: создаёт уменьшенные копии '
+            'в пуле процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 — обрабатывать в текущем процессе.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Сколько заданий забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, ожидая новые задания.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Пауза при пустой очереди в режиме --loop, сек.'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Вернуть в очередь задания, зависшие дольше, сек.'
+        )
+
+    def handle(self, *args, workers, batch_size, loop, interval,
+               stale_after, **options):
+        requeued = requeue_stale_image_jobs(stale_after)
+        if requeued:
+            self.stdout.write(f'Возвращено в очередь: {requeued}')
+        pool = None
+        if workers:
+            pool = ProcessPoolExecutor(workers, initializer=django.setup)
+        done = failed = 0
+        try:
+            while True:
+                jobs = claim_image_jobs(batch_size)
+                if not jobs:
+                    if not loop:
+                        break
+                    time.sleep(interval)
+                    continue
+                for job, error in self._run(pool, jobs):
+                    if error is None:
+                        done += 1
+                    else:
+                        failed += 1
+                        self.stderr.write(f'{job.image}: {error}')
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(f'Обработано: {done}, ошибок: {failed}')
+
+    def _run(self, pool, jobs):
+        if pool is None:
+            for job in jobs:
+                run_image_job(job)
+                yield job, job.error or None
+            return
+        futures = {pool.submit(process_image, job.image): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                variants = future.result()
+            except (OSError, ValueError) as error:
+                finish_image_job(job, error)
+                yield job, error
+            else:
+                finish_image_job(job, variants=variants)
+                yield job, None
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.scheduling import next_due_pub_date, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = ('Показывает в лентах отложенные публикации, время которых '
+            'наступило.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, просыпаясь к следующей публикации.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60,
+            help='Максимальная пауза между проверками в режиме --loop, сек.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество публикаций, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, loop, interval, batch_size, **options):
+        while True:
+            published = publish_due_posts(batch_size=batch_size)
+            if published or not loop:
+                self.stdout.write(f'Опубликовано: {published}')
+            if not loop:
+                return
+            pause = interval
+            next_due = next_due_pub_date()
+            if next_due is not None:
+                pause = min(
+                    interval, (next_due - timezone.now()).total_seconds()
+                )
+            time.sleep(max(pause, 0.1))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает полнотекстовый индекс публикаций, например '
+            'после массовой загрузки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько публикаций индексировать за один запрос.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        started = time.monotonic()
+        indexed = rebuild_index(batch_size)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Проиндексировано публикаций: {indexed} за {elapsed:.1f} с'
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.caching import bump_card_generation
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает поле comment_count у всех публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Количество публикаций, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        last_pk = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        updated = 0
+        for start in range(0, last_pk, batch_size):
+            with transaction.atomic():
+                updated += Post.objects.filter(
+                    pk__gt=start, pk__lte=start + batch_size
+                ).recount_comments()
+        bump_card_generation()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано публикаций: {updated}')
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.sitemaps import update_sitemaps
+
+
+class Command(BaseCommand):
+    help = ('Обновляет карту сайта в BLOG_SITEMAP_ROOT: переписывает только '
+            'части, публикации которых изменились.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true', dest='full',
+            help='Переписать все части карты сайта.'
+        )
+        parser.add_argument(
+            '--base-url', default=settings.BLOG_SITE_URL,
+            help='Адрес сайта для ссылок в карте.'
+        )
+
+    def handle(self, *args, full, base_url, **options):
+        started = time.monotonic()
+        written, removed = update_sitemaps(
+            settings.BLOG_SITEMAP_ROOT, base_url, full=full
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Обновлено частей карты сайта: {written}, удалено: {removed} '
+            f'за {elapsed:.1f} с'
+        )
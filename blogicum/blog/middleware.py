@@ -0,0 +1,78 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('blog.query_budget')
+
+_exempt = ContextVar('query_budget_exempt', default=False)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_query_budget(view_name):
+    return settings.QUERY_BUDGETS.get(view_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+@contextmanager
+def exempt_from_query_budget():
+    """Leave the queries run inside out of the request's count.
+
+    For upkeep a request happens to trigger, such as promoting scheduled
+    posts that fell due, whose cost does not belong to the view.
+    """
+    token = _exempt.set(True)
+    try:
+        yield
+    finally:
+        _exempt.reset(token)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _exempt.get():
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMiddleware:
+    """Count SQL queries per request and report views over their budget.
+
+    Budgets come from QUERY_BUDGETS (keyed by view name, e.g.
+    'blog:index') with QUERY_BUDGET_DEFAULT as the fallback. Meant for
+    development and staging: QUERY_BUDGET_ACTION 'log' writes a warning,
+    'raise' fails the request with QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response['X-Query-Count'] = counter.count
+        match = request.resolver_match
+        if match is None:
+            return response
+        budget = get_query_budget(match.view_name)
+        if counter.count > budget:
+            message = (
+                f'{match.view_name} ({request.path}) made {counter.count} '
+                f'queries, budget is {budget}'
+            )
+            if settings.QUERY_BUDGET_ACTION == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,23 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+def hide_posts_of_hidden_categories(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(
+        Q(category__isnull=True) | Q(category__is_published=False),
+        is_visible=True,
+    ).update(is_visible=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            hide_posts_of_hidden_categories, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def _refill_fts_table(apps, schema_editor, analyze):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.using(schema_editor.connection.alias)
+    schema_editor.execute('DELETE FROM blog_post_fts')
+    last_pk = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', 'title', 'text'
+                )[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            cursor.executemany(
+                'INSERT INTO blog_post_fts(rowid, title, text) '
+                'VALUES (%s, %s, %s)',
+                [(pk, analyze(title), analyze(text))
+                 for pk, title, text in batch],
+            )
+            last_pk = batch[-1][0]
+
+
+def store_analyzed_text(apps, schema_editor):
+    from blog.analysis import get_analyzer
+
+    _refill_fts_table(apps, schema_editor, get_analyzer().analyze)
+
+
+def store_raw_text(apps, schema_editor):
+    _refill_fts_table(apps, schema_editor, str)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_post_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(store_analyzed_text, store_raw_text),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_post_fts_analyzed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagejob',
+            name='retry_after',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Повторить после'),
+        ),
+    ]
@@ -1,6 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
+
+from .images import (
+    DERIVATIVE_SIZES, FORMAT_MIME_TYPES, ImageVariant, derivative_url,
+    read_image_info, responsive_srcset, scaled_size
+)
+from .storage import ContentAddressedStorage
 
 User = get_user_model()
 # Create your models here.
@@ -43,6 +51,57 @@ class Location (BaseModel):
         return self.name
 
 
+# Post fields that Post.is_visible is computed from.
+VISIBILITY_FIELDS = frozenset(
+    ('is_published', 'pub_date', 'category', 'category_id')
+)
+
+
+class PostQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Update the posts and recompute is_visible if it may change.
+
+        Caches and the publishing schedule are left alone, as with any
+        update(): bump them and call blog.scheduling.reset_schedule().
+        """
+        if 'is_visible' in kwargs or not VISIBILITY_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            post_ids = list(self.order_by().values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+            for start in range(0, len(post_ids), 500):
+                Post.objects.filter(
+                    pk__in=post_ids[start:start + 500]
+                ).refresh_visibility()
+        return updated
+
+    def refresh_visibility(self):
+        """Set is_visible from the current state of the posts."""
+        visible = models.Q(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category__is_published=True,
+        )
+        return (
+            self.filter(visible, is_visible=False).update(is_visible=True)
+            + self.filter(is_visible=True).exclude(visible).update(
+                is_visible=False
+            )
+        )
+
+    def recount_comments(self):
+        """Set comment_count from the comments the posts have now."""
+        counts = Comment.objects.filter(
+            post=models.OuterRef('pk')
+        ).order_by().values('post').annotate(
+            total=models.Count('pk')
+        ).values('total')
+        return self.update(comment_count=Coalesce(
+            models.Subquery(counts, output_field=models.IntegerField()), 0
+        ))
+
+
 class Post(BaseModel):
     title = models.CharField('Заголовок', max_length=256)
     text = models.TextField('Текст')
@@ -57,12 +116,132 @@ class Post(BaseModel):
                                  blank=True, verbose_name='Местоположение')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL,
                                  null=True, verbose_name='Категория')
-    image = models.ImageField('Фото', upload_to='birthdays_images', blank=True)
+    image = models.ImageField('Фото', upload_to='birthdays_images', blank=True,
+                              storage=ContentAddressedStorage())
+    comment_count = models.PositiveIntegerField('Количество комментариев',
+                                                default=0, editable=False)
+    is_visible = models.BooleanField('Показывается в лентах', default=False,
+                                     editable=False)
+    # Name of the image whose resized copies are on disk; they are stale
+    # or missing while it differs from image.name.
+    derivatives_image = models.CharField(
+        'Изображение с уменьшенными копиями', max_length=100, blank=True,
+        editable=False
+    )
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+    # Displayed width and height and byte size of image, read at upload.
+    image_meta = models.JSONField('Сведения об изображении', default=dict,
+                                  blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # Kept up to date with update() by blog.signals and blog.jobs, so an
+    # ordinary save() of an existing post leaves them alone.
+    OUT_OF_BAND_FIELDS = ('comment_count', 'derivatives_image', 'image_meta')
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',),
+                         condition=models.Q(is_visible=True),
+                         name='post_visible_pub_date_idx'),
+            models.Index(fields=('category', 'pub_date'),
+                         condition=models.Q(is_visible=True),
+                         name='post_category_pub_date_idx'),
+            models.Index(fields=('pub_date',),
+                         condition=models.Q(is_published=True,
+                                            is_visible=False),
+                         name='post_scheduled_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_pub_date_idx'),
+        )
+
+    def save(self, *args, **kwargs):
+        # Posts scheduled for later are promoted by blog.scheduling,
+        # category toggles are propagated by blog.signals.
+        update_fields = kwargs.get('update_fields')
+        if update_fields and VISIBILITY_FIELDS & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'is_visible'}
+        self.is_visible = (
+            self.is_published
+            and self.pub_date <= timezone.now()
+            and self.category_id is not None
+            and self.category.is_published
+        )
+        image_uploaded = bool(self.image) and not self.image._committed
+        if image_uploaded:
+            self.image_meta = read_image_info(self.image)
+        elif not self.image:
+            self.image_meta = {}
+        stored = self.pk is not None and not self._state.adding
+        if stored and not args and not (
+            kwargs.get('update_fields') or kwargs.get('force_insert')
+        ):
+            # The instance may predate a comment or a finished image job.
+            skipped = set(self.OUT_OF_BAND_FIELDS)
+            if image_uploaded or not self.image:
+                skipped.discard('image_meta')
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+        if image_uploaded and not self._reuse_derivatives():
+            # Resizing is done by the process_image_jobs worker.
+            ImageJob.objects.create(post=self, image=self.image.name)
+
+    def _reuse_derivatives(self):
+        # Identical uploads share one file, and so its resized copies.
+        meta = Post.objects.filter(
+            derivatives_image=self.image.name
+        ).exclude(pk=self.pk).values_list('image_meta', flat=True).first()
+        if meta is None or 'variants' not in meta:
+            return False
+        self.derivatives_image = self.image.name
+        self.image_meta['variants'] = meta['variants']
+        Post.objects.filter(pk=self.pk).update(
+            derivatives_image=self.derivatives_image,
+            image_meta=self.image_meta,
+        )
+        return True
+
+    @property
+    def image_derivatives_ready(self):
+        return bool(self.image) and self.derivatives_image == self.image.name
+
+    def _image_variant(self, size):
+        width = self.image_meta.get('width')
+        height = self.image_meta.get('height')
+        if not self.image_derivatives_ready:
+            return ImageVariant(self.image.url, width, height)
+        if width and height:
+            width, height = scaled_size(width, height, DERIVATIVE_SIZES[size])
+        url = derivative_url(self.image, size)
+        variants = self.image_meta.get('variants')
+        if not variants:
+            return ImageVariant(url, width, height)
+        widths = variants['widths']
+        return ImageVariant(
+            url, width, height,
+            srcset=responsive_srcset(self.image, widths),
+            sources=[
+                (
+                    FORMAT_MIME_TYPES[image_format],
+                    responsive_srcset(self.image, widths, image_format),
+                )
+                for image_format in variants['formats']
+            ],
+        )
+
+    @property
+    def image_thumb(self):
+        return self._image_variant('thumb')
+
+    @property
+    def image_medium(self):
+        return self._image_variant('medium')
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'id': self.id})
@@ -80,3 +259,48 @@ class Comment(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_idx'),
+        )
+
+
+class ImageJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='image_jobs',
+                             verbose_name='Публикация')
+    image = models.CharField('Файл изображения', max_length=255)
+    status = models.CharField('Статус', max_length=16,
+                              choices=STATUS_CHOICES, default=PENDING)
+    claim = models.CharField('Обработчик', max_length=32, blank=True)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    # A failed job waits in the queue until then before its next attempt.
+    retry_after = models.DateTimeField('Повторить после', null=True,
+                                       blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        indexes = (
+            models.Index(fields=('status', 'created_at'),
+                         name='imagejob_status_created_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.image} ({self.get_status_display()})'
@@ -0,0 +1,297 @@
+import base64
+import binascii
+import math
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(obj, order_field, reverse=False):
+    # obj is a model instance or a values() row including 'id'.
+    if isinstance(obj, dict):
+        value, pk = obj[order_field], obj['id']
+    else:
+        value, pk = getattr(obj, order_field), obj.pk
+    raw = '{}|{}|{}'.format(
+        'p' if reverse else 'n',
+        value.isoformat() if hasattr(value, 'isoformat') else repr(value),
+        pk,
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        direction, raw_value, pk = raw.split('|')
+        value = parse_datetime(raw_value)
+        if value is None:
+            value = float(raw_value)
+            if not math.isfinite(value):
+                raise ValueError(raw_value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if direction not in ('n', 'p'):
+        raise InvalidCursor(cursor)
+    return direction == 'p', value, pk
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset pagination over (order_field, id), newest first by default.
+
+    Unlike Paginator it never runs COUNT(*) or OFFSET: every page is a range
+    query starting at the key of the last row shown. order_field must be a
+    datetime or a number, e.g. a search rank annotation; with unique set it
+    orders the rows alone and id is left out of the key.
+    """
+
+    def __init__(self, object_list, per_page, order_field='pub_date',
+                 descending=True, unique=False):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.order_field = order_field
+        self.descending = descending
+        self.unique = unique
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def _ordering(self, descending):
+        fields = (self.order_field,) if self.unique else (
+            self.order_field, 'pk'
+        )
+        return [f'-{field}' if descending else field for field in fields]
+
+    def _after(self, value, pk, backwards):
+        lookup = 'gt' if self.descending == backwards else 'lt'
+        field = self.order_field
+        condition = Q(**{f'{field}__{lookup}': value})
+        if not self.unique:
+            condition |= Q(**{field: value, f'pk__{lookup}': pk})
+        return self.object_list.filter(condition).order_by(
+            *self._ordering(self.descending != backwards)
+        )
+
+    def _cursor_page(self, rows, has_next, has_previous):
+        if not rows:
+            return CursorPage([], None, None)
+        return CursorPage(
+            rows,
+            encode_cursor(rows[-1], self.order_field)
+            if has_next else None,
+            encode_cursor(rows[0], self.order_field, reverse=True)
+            if has_previous else None,
+        )
+
+    def page(self, cursor):
+        reverse = False
+        if cursor:
+            reverse, value, pk = decode_cursor(cursor)
+            queryset = self._after(value, pk, backwards=reverse)
+        else:
+            queryset = self.object_list.order_by(
+                *self._ordering(self.descending)
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            return self._cursor_page(rows, True, has_more)
+        return self._cursor_page(rows, has_more, bool(cursor))
+
+    def last_page(self):
+        rows = list(self.object_list.order_by(
+            *self._ordering(not self.descending)
+        )[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._cursor_page(rows, False, has_previous)
+
+
+class ChainedCursorPaginator:
+    """Pages through several CursorPaginators one after another.
+
+    E.g. ranked search results followed by the unranked rest, each in its
+    own order. A page never spans two paginators, so the last page of one
+    may be short. Cursors carry the index of their paginator.
+    """
+
+    LAST_PAGE = 'last'
+
+    def __init__(self, paginators):
+        self.paginators = paginators
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def _split(self, cursor):
+        if not cursor:
+            return 0, None
+        index, separator, inner = cursor.partition('.')
+        try:
+            index = int(index)
+        except ValueError:
+            raise InvalidCursor(cursor)
+        if not separator or not 0 <= index < len(self.paginators):
+            raise InvalidCursor(cursor)
+        return index, inner or None
+
+    def page(self, cursor):
+        index, inner = self._split(cursor)
+        paginator = self.paginators[index]
+        if inner == self.LAST_PAGE:
+            page = paginator.last_page()
+        else:
+            page = paginator.page(inner)
+        next_cursor = page.next_cursor and f'{index}.{page.next_cursor}'
+        previous_cursor = (
+            page.previous_cursor and f'{index}.{page.previous_cursor}'
+        )
+        if (
+            next_cursor is None and page.object_list
+            and index + 1 < len(self.paginators)
+            and self.paginators[index + 1].object_list.exists()
+        ):
+            next_cursor = f'{index + 1}.'
+        if previous_cursor is None and index > 0:
+            previous_cursor = f'{index - 1}.{self.LAST_PAGE}'
+        return CursorPage(page.object_list, next_cursor, previous_cursor)
+
+
+class WindowedPage(Page):
+    # Set by CachedCountPaginator for pages it cannot check against count.
+    has_more = None
+
+    def has_next(self):
+        if self.has_more is not None:
+            return self.has_more
+        return super().has_next()
+
+    def next_page_number(self):
+        if self.has_more:
+            return self.number + 1
+        return super().next_page_number()
+
+    @property
+    def page_window(self):
+        paginator = self.paginator
+        if self.number <= paginator.num_pages:
+            return list(paginator.get_elided_page_range(
+                self.number, on_each_side=2, on_ends=1
+            ))
+        # Past the counted pages: the first one and the neighbours.
+        start = max(self.number - 2, 2)
+        return [1, *([paginator.ELLIPSIS] if start > 2 else []),
+                *range(start, self.number + 1)]
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose COUNT(*) is cached and optionally capped.
+
+    count_key must change whenever the number of rows may change, e.g.
+    blog.caching.feed_cache_key(). With count_limit set, counting stops
+    after count_limit rows and count_is_approximate tells the template
+    that the feed goes on past the last page it knows about. Pages after
+    that one are still served: each reads one row more than it shows to
+    tell whether there is a next page.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 count_limit=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_limit = count_limit
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return self._count()
+        count = cache.get(self.count_key)
+        if count is None:
+            count = self._count()
+            cache.set(self.count_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def _count(self):
+        object_list = self.object_list.order_by()
+        if self.count_limit is not None:
+            object_list = object_list[:self.count_limit]
+        return object_list.count()
+
+    @property
+    def count_is_approximate(self):
+        return self.count_limit is not None and self.count >= self.count_limit
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if not self.count_is_approximate or int(number) < 1:
+                raise
+        number = int(number)
+        bottom = (number - 1) * self.per_page
+        if not self.object_list[bottom:bottom + 1].exists():
+            raise EmptyPage('That page contains no results')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if number <= self.num_pages and not (
+            self.count_is_approximate and number == self.num_pages
+        ):
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
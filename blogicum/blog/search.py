@@ -0,0 +1,161 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .analysis import get_analyzer
+from .models import Post
+from .paginators import ChainedCursorPaginator, CursorPaginator
+
+FTS_TABLE = 'blog_post_fts'
+# Matches in the title weigh ten times as much as matches in the text.
+RANK_SQL = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+
+# Only the newest matches are ranked: bm25() over every post containing a
+# frequent word costs seconds at a million posts, this window milliseconds.
+RANK_WINDOW = 2000
+
+TOKEN_RE = re.compile(r'(\w+)(\*?)')
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def _index_rows(posts):
+    # The index keeps analyzed text only, e.g. stems instead of words.
+    analyzer = get_analyzer()
+    return [
+        (post.pk, analyzer.analyze(post.title), analyzer.analyze(post.text))
+        for post in posts
+    ]
+
+
+def index_posts(posts):
+    """(Re)write the FTS rows of posts; the rowid is the post id."""
+    if not search_available():
+        return
+    rows = _index_rows(posts)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(row[0],) for row in rows],
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE}(rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            rows,
+        )
+
+
+def unindex_posts(post_ids):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(post_id,) for post_id in post_ids],
+        )
+
+
+def rebuild_index(batch_size=1000):
+    """Refill the whole index from blog_post, for use after bulk loads."""
+    if not search_available():
+        return 0
+    indexed = 0
+    last_pk = 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').only(
+                    'title', 'text'
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            index_posts(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+    return indexed
+
+
+def _query_terms(query):
+    tokens = TOKEN_RE.findall(query)
+    terms = get_analyzer().normalize([word for word, _ in tokens])
+    return [
+        (term, star) for term, (_, star) in zip(terms, tokens) if term
+    ]
+
+
+def match_expression(query):
+    """Turn user input into an FTS5 query matching all of its words.
+
+    Words go through the same analyzer as the indexed text, so any form
+    of a word finds the others. They are quoted, so FTS5 operators typed
+    by the user are not interpreted; a trailing * still asks for a prefix
+    match.
+    """
+    return ' '.join(f'"{term}"{star}' for term, star in _query_terms(query))
+
+
+def search_posts(queryset, query):
+    """Split the posts of queryset matching query in two querysets.
+
+    The first holds the RANK_WINDOW newest matches annotated with rank,
+    lower is better; order it by ('rank', 'pk'). The second holds the
+    older matches, left unranked; order it by 'match_id', their unique
+    FTS rowid, which FTS5 returns in order without sorting. Without FTS5
+    falls back to icontains of the analyzed words over title and text,
+    all in the first queryset with a constant rank.
+    """
+    ranked = queryset.annotate(rank=RawSQL('0.0', ()))
+    older = queryset.none().annotate(match_id=RawSQL('0', ()))
+    expression = match_expression(query)
+    if not expression:
+        return ranked.none(), older
+    if not search_available():
+        for term, _ in _query_terms(query):
+            ranked = ranked.filter(
+                Q(title__icontains=term) | Q(text__icontains=term)
+            )
+        return ranked, older
+    matches = queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = blog_post.id', f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+    )
+    # The window is taken after the filters of queryset, so hidden posts
+    # do not use up its slots.
+    window_sql, window_params = matches.extra(
+        order_by=[f'-{FTS_TABLE}.rowid']
+    ).values('pk')[:RANK_WINDOW].query.sql_with_params()
+    window_start = f'(SELECT MIN(id) FROM ({window_sql}))'
+    # A rowid range, unlike IN, is applied inside the FTS5 scan.
+    return (
+        matches.extra(
+            where=[f'{FTS_TABLE}.rowid >= {window_start}'],
+            params=window_params,
+        ).annotate(rank=RawSQL(RANK_SQL, ())),
+        matches.extra(
+            where=[f'{FTS_TABLE}.rowid < {window_start}'],
+            params=window_params,
+        ).annotate(match_id=RawSQL(f'{FTS_TABLE}.rowid', ())),
+    )
+
+
+def search_paginator(queryset, query, per_page):
+    """Ranked matches first, then the older ones, newest first."""
+    ranked, older = search_posts(queryset, query)
+    return ChainedCursorPaginator([
+        CursorPaginator(
+            ranked, per_page, order_field='rank', descending=False
+        ),
+        CursorPaginator(older, per_page, order_field='match_id', unique=True),
+    ])
@@ -0,0 +1,162 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import (
+    bump_card_version, bump_feed_generation, bump_feed_versions,
+    invalidate_post_feeds, post_feed_state
+)
+from .jobs import run_image_job
+from .models import Category, Comment, ImageJob, Location, Post
+from .scheduling import (
+    posts_published, refresh_category_visibility, reset_schedule,
+    update_in_batches
+)
+from .search import index_posts, unindex_posts
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1, updated_at=timezone.now()
+        )
+        bump_card_version('post', instance.post_id)
+        invalidate_post_feeds(post_feed_state(instance.post_id))
+
+
+@receiver(post_save, sender=Comment)
+def touch_commented_post(sender, instance, created, raw=False, **kwargs):
+    # Post.updated_at stands for the newest change of its comments too.
+    if not created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    # Also fires for comments removed by cascade (post or author deletion).
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1, updated_at=timezone.now()
+    )
+    bump_card_version('post', instance.post_id)
+    invalidate_post_feeds(post_feed_state(instance.post_id))
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_post_feed_state(sender, instance, raw=False, **kwargs):
+    if instance.pk is not None and not raw:
+        instance._feed_state = post_feed_state(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, **kwargs):
+    bump_card_version('post', instance.pk)
+    if instance.is_published and not instance.is_visible:
+        reset_schedule()
+    invalidate_post_feeds(
+        getattr(instance, '_feed_state', None), post_feed_state(instance.pk)
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        index_posts((instance,))
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    unindex_posts((instance.pk,))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    bump_card_version('post', instance.pk)
+    invalidate_post_feeds(getattr(instance, '_feed_state', None))
+
+
+@receiver(posts_published)
+def invalidate_published_posts(sender, post_ids, **kwargs):
+    rows = Post.objects.filter(
+        pk__in=post_ids, is_visible=True
+    ).values_list('category__slug', 'author_id').distinct()
+    feeds = set()
+    for slug, author_id in rows:
+        feeds.update(
+            ('index', f'category:{slug}', f'author:{author_id}')
+        )
+    bump_feed_versions(feeds)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, raw=False, **kwargs):
+    if instance.pk is not None and not raw:
+        instance._feed_state = Category.objects.filter(
+            pk=instance.pk
+        ).values('slug', 'is_published').first()
+
+
+@receiver(post_save, sender=Category)
+def invalidate_category(sender, instance, raw=False, **kwargs):
+    old_state = getattr(instance, '_feed_state', None)
+    if not raw and old_state is not None and (
+        old_state['is_published'] != instance.is_published
+    ):
+        refresh_category_visibility(instance)
+    bump_card_version('category', instance.pk)
+    if old_state is not None:
+        # Category titles show on cards of every feed, profiles included,
+        # and public profile counts span categories; edits are rare.
+        bump_feed_generation()
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance, **kwargs):
+    # Deletion nulls Post.category with a bulk update, bypassing Post.save.
+    update_in_batches(
+        Post.objects.filter(category=instance, is_visible=True),
+        is_visible=False,
+    )
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category(sender, instance, **kwargs):
+    if instance.is_published:
+        bump_feed_generation()
+
+
+@receiver(post_save, sender=Location)
+def invalidate_location(sender, instance, created, **kwargs):
+    if created:
+        return
+    bump_card_version('location', instance.pk)
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created, update_fields=None,
+                      **kwargs):
+    if created or (
+        update_fields and set(update_fields) <= {'last_login', 'password'}
+    ):
+        return
+    bump_card_version('user', instance.pk)
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=ImageJob)
+def run_image_job_eagerly(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and settings.BLOG_IMAGE_JOBS_EAGER:
+        instance.status = ImageJob.RUNNING
+        instance.attempts = 1
+        run_image_job(instance)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from xml.sax.saxutils import escape
+
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, Count, F, Max, Q, Sum
+from django.db.models.functions import Cast, Substr
+from django.urls import reverse
+
+from .models import Category, Post
+from .views import filter_posts
+
+# URLs per file allowed by the sitemap protocol; bigger shards are split.
+SITEMAP_LIMIT = 50_000
+# Authors per profiles shard, by id range.
+PROFILE_SHARD_SIZE = 10_000
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+
+User = get_user_model()
+
+# fingerprint changes whenever the URLs or lastmod dates of the shard do;
+# urls() yields (path, lastmod) pairs.
+Shard = namedtuple('Shard', 'name fingerprint lastmod urls')
+
+
+def shard_filename(name, part=0):
+    return f'sitemap-{name}.xml' if not part else f'sitemap-{name}-{part}.xml'
+
+
+def _fingerprint(*values):
+    return hashlib.md5(repr(values).encode()).hexdigest()
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def _post_urls(category_id, month):
+    posts = filter_posts(Post.objects.filter(
+        category_id=category_id,
+        pub_date__gte=month,
+        pub_date__lt=_next_month(month),
+    ))
+    for pk, updated_at in posts.order_by('pk').values_list(
+        'pk', 'updated_at'
+    ).iterator(chunk_size=2000):
+        yield reverse('blog:post_detail', args=(pk,)), updated_at
+
+
+def post_shards():
+    """One shard per category and month of pub_date, in UTC."""
+    # 'YYYY-MM' of the stored UTC value; TruncMonth runs a Python function
+    # per row on SQLite, ten times slower at a million posts.
+    rows = filter_posts(Post.objects.all()).annotate(
+        month=Substr(Cast('pub_date', CharField()), 1, 7)
+    ).values('category_id', 'month').annotate(
+        count=Count('pk'), pk_sum=Sum('pk'), lastmod=Max('updated_at')
+    ).order_by()
+    for row in rows:
+        category_id = row['category_id']
+        month = datetime.strptime(row['month'], '%Y-%m').replace(
+            tzinfo=dt_timezone.utc
+        )
+        yield Shard(
+            f'posts-{category_id or 0}-{row["month"]}',
+            _fingerprint(row['count'], row['pk_sum'], row['lastmod']),
+            row['lastmod'],
+            lambda category_id=category_id, month=month: _post_urls(
+                category_id, month
+            ),
+        )
+
+
+def category_shard():
+    rows = list(Category.objects.filter(is_published=True).annotate(
+        lastmod=Max('post__updated_at', filter=Q(post__is_visible=True))
+    ).order_by('pk').values_list('slug', 'lastmod'))
+    return Shard(
+        'categories',
+        _fingerprint(rows),
+        max((lastmod for _, lastmod in rows if lastmod), default=None),
+        lambda: (
+            (reverse('blog:category_posts', args=(slug,)), lastmod)
+            for slug, lastmod in rows
+        ),
+    )
+
+
+def _profile_urls(bucket):
+    authors = User.objects.filter(
+        pk__gte=bucket * PROFILE_SHARD_SIZE,
+        pk__lt=(bucket + 1) * PROFILE_SHARD_SIZE,
+        post__is_visible=True,
+    ).annotate(lastmod=Max('post__updated_at')).order_by('pk')
+    for username, lastmod in authors.values_list(
+        'username', 'lastmod'
+    ).iterator(chunk_size=2000):
+        yield reverse('blog:profile', args=(username,)), lastmod
+
+
+def profile_shards():
+    """Profiles of authors with visible posts, by ranges of author id.
+
+    A rename keeps the fingerprint, so it shows up after the next full
+    rebuild only.
+    """
+    rows = filter_posts(Post.objects.all()).annotate(
+        bucket=F('author_id') / PROFILE_SHARD_SIZE
+    ).values('bucket').annotate(
+        authors=Count('author_id', distinct=True),
+        author_sum=Sum('author_id', distinct=True),
+        lastmod=Max('updated_at'),
+    ).order_by()
+    for row in rows:
+        bucket = row['bucket']
+        yield Shard(
+            f'profiles-{bucket}',
+            _fingerprint(row['authors'], row['author_sum'], row['lastmod']),
+            row['lastmod'],
+            lambda bucket=bucket: _profile_urls(bucket),
+        )
+
+
+def collect_shards():
+    return [category_shard(), *profile_shards(), *post_shards()]
+
+
+def _lastmod(value):
+    return value.astimezone(dt_timezone.utc).isoformat() if value else None
+
+
+def _write_atomically(path, chunks):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        file.writelines(chunks)
+    os.replace(tmp_path, path)
+
+
+def _url_entries(tag, entries):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield f'<{tag} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    child = 'sitemap' if tag == 'sitemapindex' else 'url'
+    for loc, lastmod in entries:
+        yield f'<{child}><loc>{escape(loc)}</loc>'
+        if lastmod:
+            yield f'<lastmod>{lastmod}</lastmod>'
+        yield f'</{child}>\n'
+    yield f'</{tag}>\n'
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_shard(root, base_url, shard):
+    """Write the files of shard, SITEMAP_LIMIT URLs each; return names."""
+    filenames = []
+    urls = ((base_url + path, _lastmod(lastmod))
+            for path, lastmod in shard.urls())
+    for part, chunk in enumerate(_chunks(urls, SITEMAP_LIMIT)):
+        filename = shard_filename(shard.name, part)
+        _write_atomically(
+            os.path.join(root, filename), _url_entries('urlset', chunk)
+        )
+        filenames.append(filename)
+    return filenames
+
+
+def _remove(root, filenames):
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(root, filename))
+        except FileNotFoundError:
+            pass
+
+
+def update_sitemaps(root, base_url, full=False):
+    """Bring the sitemap files under root up to date with the database.
+
+    Shard fingerprints are kept in root/manifest.json; only shards whose
+    posts, categories or authors changed since are written again, and
+    shards left without URLs are deleted. Returns the numbers of written
+    and removed shards.
+    """
+    base_url = base_url.rstrip('/')
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding='utf-8') as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        manifest = {}
+    if manifest.get('base_url') != base_url:
+        full = True
+    known = manifest.get('shards', {})
+    shards = {}
+    written = 0
+    for shard in collect_shards():
+        entry = known.get(shard.name)
+        if not full and entry and entry['fingerprint'] == shard.fingerprint:
+            shards[shard.name] = entry
+            continue
+        filenames = write_shard(root, base_url, shard)
+        if entry:
+            _remove(root, set(entry['files']) - set(filenames))
+        written += 1
+        shards[shard.name] = {
+            'fingerprint': shard.fingerprint,
+            'lastmod': _lastmod(shard.lastmod),
+            'files': filenames,
+        }
+    removed = known.keys() - shards.keys()
+    for name in removed:
+        _remove(root, known[name]['files'])
+    if full or written or removed or not os.path.exists(
+        os.path.join(root, INDEX_NAME)
+    ):
+        _write_atomically(
+            os.path.join(root, INDEX_NAME),
+            _url_entries('sitemapindex', (
+                (f'{base_url}/{filename}', entry['lastmod'])
+                for _, entry in sorted(shards.items())
+                for filename in entry['files']
+            )),
+        )
+    _write_atomically(
+        manifest_path,
+        json.dumps({'base_url': base_url, 'shards': shards}, indent=1),
+    )
+    return written, len(removed)
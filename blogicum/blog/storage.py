@@ -0,0 +1,63 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_NAME_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names uploads by their SHA-256.
+
+    upload_to/photo.JPG is stored as upload_to/ab/cd/abcd...ef.jpg, so
+    directories stay small and an identical upload reuses the file that
+    is already there instead of writing a copy.
+
+    Only save() renames; resized copies are written next to the original
+    with save_as() under names derived from it.
+    """
+
+    shard_depth = 2
+    shard_width = 2
+
+    def content_name(self, name, content):
+        digest = content_hash(content)
+        shards = [
+            digest[i * self.shard_width:(i + 1) * self.shard_width]
+            for i in range(self.shard_depth)
+        ]
+        ext = posixpath.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name), *shards, f'{digest}{ext}'
+        )
+
+    def is_content_name(self, name):
+        root = posixpath.splitext(posixpath.basename(name))[0]
+        return bool(HASH_NAME_RE.match(root))
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_as(self, name, content, max_length=None):
+        """Save content under name itself rather than its content hash."""
+        return super().save(name, content, max_length=max_length)
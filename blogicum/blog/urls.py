@@ -1,16 +1,44 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('create/', views.create_post, name='create_post'),
+    path('search/', views.search, name='search'),
+    path('feed/rss/', feeds.PostsFeed(), name='feed_rss'),
+    path('feed/atom/', feeds.PostsAtomFeed(), name='feed_atom'),
     path('<slug:category_slug>/', views.category_posts, name='category_posts'),
+    path(
+        '<slug:category_slug>/feed/rss/',
+        feeds.CategoryPostsFeed(),
+        name='category_feed_rss'
+    ),
+    path(
+        '<slug:category_slug>/feed/atom/',
+        feeds.CategoryPostsAtomFeed(),
+        name='category_feed_atom'
+    ),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/rss/',
+        feeds.AuthorPostsFeed(),
+        name='profile_feed_rss'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.AuthorPostsAtomFeed(),
+        name='profile_feed_atom'
+    ),
     path(
         'posts/<int:post_id>/edit/',
         views.PostUpdateView.as_view(),
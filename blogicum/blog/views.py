@@ -2,64 +2,83 @@ from django.shortcuts import get_object_or_404, render, redirect
 from .models import Post, Category, Comment
 from .forms import PostForm, ProfileForm, CommentForm
 
-from django.db.models import Count
+from django.db import transaction
 
 from django.contrib.auth.decorators import login_required
 
-from django.core.paginator import Paginator
+from django.conf import settings
 
 from django.contrib.auth import get_user_model
 
-import datetime
-
-import pytz
-
-from django.utils import timezone
-
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
 from django.views.generic import UpdateView
 
 from django.urls import reverse
 
+from django.utils.http import urlencode
+
+from django.views.decorators.http import condition
+
+from django.views.static import serve
 
+from .caching import (
+    attach_card_versions, cache_anonymous_feed, feed_cache_key, feed_etag,
+    post_etag, post_last_modified, profile_etag
+)
+from .paginators import CachedCountPaginator, CursorPaginator
+from .scheduling import publish_due_posts_if_needed
+from .search import search_paginator
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
+
+@condition(etag_func=feed_etag('index'))
+@cache_anonymous_feed('index')
 def index(request):
     template_name = 'blog/index.html'
-    post_list = filter_posts(
-        Post.objects.select_related('location', 'category')
-    )
-    post_list_comments = get_comment_count(post_list)
-    post_list_comments = sort_posts(post_list_comments)
+    post_list = filter_posts(select_post_relations(Post.objects))
+    post_list = sort_posts(post_list)
 
-    page_number = request.GET.get('page')
-    page_obj = get_paginator_page(post_list_comments, page_number, 10)
+    page_obj = get_posts_page(request, post_list, 'index')
 
     context = {'page_obj': page_obj}
     return render(request, template_name, context)
 
 
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
 def post_detail(request, post_id):
     template_name = 'blog/detail.html'
-    now = datetime.datetime.now().replace(tzinfo=pytz.utc)
+    publish_due_posts_if_needed()
     try:
         post = get_object_or_404(
-            Post.objects.select_related('location', 'category'),
-            pk=post_id
+            select_post_relations(Post.objects), pk=post_id
         )
-        expr = (post.is_published is False)\
-            or (post.category.is_published is False)\
-            or (post.pub_date > now)
-        if (expr) and request.user.pk != post.author.id:
+        if not post.is_visible and request.user.pk != post.author_id:
             return render(request, 'pages/404.html', status=404)
     except Exception:
         return render(request, 'pages/404.html', status=404)
     context = {'post': post}
     context['form'] = CommentForm()
-    comments = Comment.objects.filter(post=post_id).order_by('created_at')
-    context['comments'] = comments
+    context['comments'] = get_comments_page(post, request.GET.get('comments'))
     return render(request, template_name, context)
 
 
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    if not post.is_visible and request.user.pk != post.author_id:
+        return render(request, 'pages/404.html', status=404)
+    context = {
+        'post': post,
+        'comments': get_comments_page(post, request.GET.get('cursor')),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
+@condition(etag_func=feed_etag('category:{category_slug}'))
+@cache_anonymous_feed('category:{category_slug}')
 def category_posts(request, category_slug):
     category = get_object_or_404(
         Category,
@@ -68,41 +87,59 @@ def category_posts(request, category_slug):
     )
 
     post_list = filter_posts(
-        Post.objects.select_related('category', 'location', 'author').
-        filter(category=category)
+        select_post_relations(Post.objects).filter(category=category)
     )
 
-    post_with_comments = get_comment_count(post_list)
-    post_with_comments = sort_posts(post_with_comments)
+    post_list = sort_posts(post_list)
 
-    page_number = request.GET.get('page')
-    page_obj = get_paginator_page(post_with_comments, page_number, 10)
+    page_obj = get_posts_page(
+        request, post_list, f'category:{category.slug}'
+    )
     return render(request, 'blog/category.html', {
         'category': category,
         'page_obj': page_obj
     })
 
 
+def search(request):
+    publish_due_posts_if_needed()
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = search_paginator(
+            filter_posts(select_post_relations(Post.objects)),
+            query,
+            POSTS_PER_PAGE,
+        ).get_page(request.GET.get('cursor'))
+        page_obj.object_list = attach_card_versions(page_obj.object_list)
+    return render(request, 'blog/search.html', {
+        'query': query,
+        'page_obj': page_obj,
+        'query_prefix': urlencode({'q': query}) + '&',
+    })
+
+
+def sitemap(request, filename):
+    # Files written by the update_sitemaps command; a fallback for when the
+    # web server does not serve BLOG_SITEMAP_ROOT itself.
+    return serve(request, filename, document_root=settings.BLOG_SITEMAP_ROOT)
+
+
 User = get_user_model()
 
 
+@condition(etag_func=profile_etag)
 def profile(request, username):
     template_name = 'blog/profile.html'
     profile = get_object_or_404(User, username=username)
-    if request.user.username != username:
-        publication_list = filter_posts(
-            Post.objects.select_related('author').
-            filter(author__username=username)
-        )
-    else:
-        publication_list = Post.objects.select_related('author').\
-            filter(author__username=username)
-
-    post_with_comments = get_comment_count(publication_list)
-    post_with_comments = sort_posts(post_with_comments)
-    page_number = request.GET.get('page')
+    publish_due_posts_if_needed()
+    is_owner = request.user.username == username
+    publication_list = sort_posts(profile_posts(profile, is_owner))
 
-    page_obj = get_paginator_page(post_with_comments, page_number, 10)
+    page_obj = get_posts_page(
+        request, publication_list, f'author:{profile.pk}',
+        'all' if is_owner else 'public'
+    )
 
     context = {'profile': profile, 'page_obj': page_obj}
     return render(request, template_name, context)
@@ -175,7 +212,8 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', post_id)
 
 
@@ -203,21 +241,53 @@ def delete_comment(request, post_id, comment_id):
     if instance.author.id != request.user.id:
         return redirect('blog:post_detail', post_id)
     if request.method == 'POST':
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
         return redirect('blog:post_detail', post_id)
     return render(request, 'blog/comment.html')
 
 
-def get_paginator_page(object_list, page_number, posts_count):
-    paginator = Paginator(object_list, posts_count)
+def get_paginator_page(object_list, page_number, posts_count,
+                       count_key=None):
+    paginator = CachedCountPaginator(
+        object_list, posts_count, count_key=count_key,
+        count_limit=settings.BLOG_APPROXIMATE_COUNT_LIMIT
+    )
     page_obj = paginator.get_page(page_number)
     return page_obj
 
 
-def get_comment_count(post_list):
-    return post_list.annotate(
-        comment_count=Count('comment')
+def get_comments_page(post, cursor):
+    paginator = CursorPaginator(
+        Comment.objects.select_related('author').filter(post=post),
+        COMMENTS_PER_PAGE,
+        order_field='created_at',
+        descending=False,
     )
+    return paginator.get_page(cursor)
+
+
+def get_posts_page(request, post_list, feed, count_variant=''):
+    if settings.BLOG_CURSOR_PAGINATION or 'cursor' in request.GET:
+        paginator = CursorPaginator(post_list, POSTS_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    else:
+        page_obj = get_paginator_page(
+            post_list, request.GET.get('page'), POSTS_PER_PAGE,
+            count_key=feed_cache_key('count', feed, count_variant)
+        )
+    page_obj.object_list = attach_card_versions(page_obj.object_list)
+    return page_obj
+
+
+def select_post_relations(post_list):
+    return post_list.select_related('location', 'category', 'author')
+
+
+def profile_posts(author, is_owner):
+    """Posts on the profile page; the owner also sees hidden ones."""
+    post_list = select_post_relations(Post.objects).filter(author=author)
+    return post_list if is_owner else filter_posts(post_list)
 
 
 def sort_posts(post_list):
@@ -225,8 +295,4 @@ def sort_posts(post_list):
 
 
 def filter_posts(post_list):
-    return post_list.filter(
-        is_published=True,
-        pub_date__lte=timezone.now(),
-        category__is_published=True
-    )
+    return post_list.filter(is_visible=True)
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -86,6 +87,20 @@ DATABASES = {
 }
 
 
+# Post card fragments, feed pages and their version counters live here.
+# The cache must be shared by the web server and the management commands
+# that bump the versions (publish_scheduled, process_image_jobs, ...), so
+# a per-process LocMemCache will not do; use Redis or Memcached in
+# production.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -142,3 +157,60 @@ EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 LOGIN_REDIRECT_URL = 'blog:index'
+
+# Keyset pagination for the index, category and profile feeds instead of
+# LIMIT/OFFSET. Requests carrying ?cursor= always use it.
+BLOG_CURSOR_PAGINATION = False
+
+# Stop counting feed rows after this many and show an open-ended page list;
+# None counts exactly. Counts are cached until the feed changes either way.
+BLOG_APPROXIMATE_COUNT_LIMIT = None
+
+# Process image jobs inside the saving request instead of leaving them to
+# the process_image_jobs worker.
+BLOG_IMAGE_JOBS_EAGER = False
+
+# Dotted path to the blog.analysis.Analyzer subclass applied to posts when
+# they are indexed and to search queries. The index stores its output, so
+# run the rebuild_search_index command after changing it.
+BLOG_SEARCH_ANALYZER = 'blog.analysis.RussianAnalyzer'
+
+# Directory the update_sitemaps command writes sitemap.xml and its shards
+# to, and the scheme and host their URLs start with. In production the
+# web server should serve the directory at the site root.
+BLOG_SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+BLOG_SITE_URL = 'http://127.0.0.1:8000'
+
+# Maximum SQL queries per request, by view name, checked by
+# blog.middleware.QueryBudgetMiddleware and by the test suite. Budgets
+# must not depend on page size or on the number of comments.
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_ACTION = 'log'
+QUERY_BUDGET_DEFAULT = 20
+QUERY_BUDGETS = {
+    'blog:index': 6,
+    'blog:post_detail': 6,
+    'blog:post_comments': 6,
+    'blog:search': 7,
+    'blog:feed_rss': 3,
+    'blog:feed_atom': 3,
+    'blog:category_feed_rss': 4,
+    'blog:category_feed_atom': 4,
+    'blog:profile_feed_rss': 5,
+    'blog:profile_feed_atom': 5,
+    'blog:create_post': 5,
+    'blog:category_posts': 7,
+    'blog:edit_profile': 5,
+    'blog:profile': 7,
+    'blog:edit_post': 8,
+    'blog:delete_post': 5,
+    'blog:add_comment': 10,
+    'blog:edit_comment': 6,
+    'blog:delete_comment': 5,
+    'api:post_list': 3,
+    'api:post_detail': 3,
+    'api:comment_list': 4,
+    'api:category_list': 3,
+    'api:category_detail': 3,
+    'api:profile_detail': 3,
+}
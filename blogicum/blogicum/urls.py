@@ -17,19 +17,24 @@ from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 
 from django.contrib import admin
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 
 from django.conf import settings
 
 from django.conf.urls.static import static
 
+from blog.views import sitemap
+
 urlpatterns = [
 
     path('admin/', admin.site.urls),
+    path('api/', include('blog.api_urls')),
     path('', include('blog.urls')),
     path('posts/', include('blog.urls')),
     path('category/', include('blog.urls')),
     path('pages/', include('pages.urls')),
+    re_path(r'^(?P<filename>sitemap(?:-[-\w]+)?\.xml)$', sitemap,
+            name='sitemap'),
     path('auth/', include('django.contrib.auth.urls')),
     path(
         'auth/registration/',
@@ -1,5 +1,7 @@
 import os
 import re
+import subprocess
+import sys
 import time
 from http import HTTPStatus
 from inspect import getsource
@@ -19,11 +21,15 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.test.utils import CaptureQueriesContext
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +47,51 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    caches = {
+        "default": {
+            **settings.CACHES["default"],
+            "LOCATION": str(tmp_path_factory.mktemp("cache")),
+        }
+    }
+    with override_settings(CACHES=caches):
+        yield caches["default"]["LOCATION"]
+
+
+@pytest.fixture
+def manage_in_subprocess(cache_dir, tmp_path):
+    """Run manage.py in another process, as a cron job or worker would.
+
+    The process gets its own database under tmp_path; only the cache is
+    shared with the tests. Returns the command's stdout.
+    """
+    (tmp_path / "subprocess_settings.py").write_text(
+        "from blogicum.settings import *  # noqa\n"
+        f"DATABASES['default']['NAME'] = {str(tmp_path / 'db.sqlite3')!r}\n"
+        f"CACHES['default']['LOCATION'] = {cache_dir!r}\n"
+    )
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(tmp_path),
+        "DJANGO_SETTINGS_MODULE": "subprocess_settings",
+    }
+
+    def _manage(*args):
+        return subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / "manage.py"), *args],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+    return _manage
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_dir):
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -92,6 +143,7 @@ pytest_plugins = [
     "fixtures.locations",
     "fixtures.categories",
     "fixtures.comments",
+    "fixtures.images",
     "adapters.comment",
 ]
 
@@ -126,6 +178,26 @@ def unlogged_client(client):
     return client
 
 
+@pytest.fixture
+def assert_query_budget():
+    """Request `url` and check it stays within QUERY_BUDGETS[view_name].
+
+    Returns the number of queries made.
+    """
+    def _assert(client, url, view_name, method="get", data=None):
+        budget = settings.QUERY_BUDGETS[view_name]
+        with CaptureQueriesContext(connection) as ctx:
+            getattr(client, method)(url, data)
+        n_queries = len(ctx.captured_queries)
+        queries = "\n".join(q["sql"] for q in ctx.captured_queries)
+        assert n_queries <= budget, (
+            f"{view_name} ({url}) made {n_queries} queries, budget is "
+            f"{budget}:\n{queries}"
+        )
+        return n_queries
+    return _assert
+
+
 @pytest.fixture
 def another_user_client(another_user):
     client = Client()
@@ -0,0 +1,36 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from mixer.backend.django import Mixer
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Keep uploads under tmp_path and resize them while saving."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.BLOG_IMAGE_JOBS_EAGER = True
+    return settings.MEDIA_ROOT
+
+
+def image_bytes(
+        size=(1600, 1000), color=(40, 160, 90), image_format="JPEG",
+        **options):
+    buffer = BytesIO()
+    Image.new("RGB", size, color=color).save(
+        buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def image_upload(name="photo.jpg", image_format="JPEG", **kwargs):
+    return SimpleUploadedFile(
+        name, image_bytes(image_format=image_format, **kwargs),
+        Image.MIME[image_format])
+
+
+@pytest.fixture
+def post_with_image(mixer: Mixer, published_category, media_root):
+    return mixer.blend(
+        "blog.Post", category=published_category, is_published=True,
+        image=image_upload())
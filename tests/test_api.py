@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category):
+    def blend(**kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("category", published_category)
+        return mixer.blend("blog.Post", author=user, **kwargs)
+    return blend
+
+
+def _get(client, url, status=200, **params):
+    response = client.get(url, params)
+    assert response.status_code == status
+    assert response["Content-Type"] == "application/json"
+    return response.json()
+
+
+def test_post_list_hides_text_and_invisible_posts(client, blend_post):
+    post = blend_post(text="Длинный текст")
+    blend_post(is_published=False)
+    data = _get(client, "/api/posts/")
+    assert [row["id"] for row in data["results"]] == [post.id]
+    row = data["results"][0]
+    assert "text" not in row
+    assert row["author"] == post.author.username
+    assert row["category"] == post.category.slug
+    assert data["next"] is None and data["previous"] is None
+
+
+def test_fields_projection(client, blend_post):
+    post = blend_post()
+    data = _get(client, "/api/posts/", fields="title,text")
+    assert data["results"] == [
+        {"id": post.id, "title": post.title, "text": post.text}]
+    with CaptureQueriesContext(connection) as ctx:
+        _get(client, "/api/posts/", fields="title")
+    sql = ctx.captured_queries[-1]["sql"]
+    assert '"blog_post"."text"' not in sql
+    assert "Неизвестные поля: secret" in _get(
+        client, "/api/posts/", 400, fields="title,secret")["detail"]
+
+
+def test_cursor_pagination(client, blend_post):
+    posts = [blend_post() for _ in range(5)]
+    seen, url, params = [], "/api/posts/", {"limit": 2}
+    while url:
+        data = _get(client, url, **params)
+        seen.extend(row["id"] for row in data["results"])
+        url, params = data["next"], {}
+    assert sorted(seen) == sorted(post.id for post in posts)
+    assert len(seen) == len(set(seen))
+    assert _get(client, "/api/posts/", 400, cursor="broken")
+
+
+def test_post_filters(client, blend_post, mixer, another_user):
+    category = mixer.blend("blog.Category", is_published=True)
+    post = blend_post(category=category)
+    blend_post()
+    mixer.blend("blog.Post", author=another_user, is_published=True,
+                category=category)
+    data = _get(client, "/api/posts/", category=category.slug,
+                author=post.author.username)
+    assert [row["id"] for row in data["results"]] == [post.id]
+
+
+def test_post_detail_and_comments(client, blend_post, mixer, user):
+    post = blend_post()
+    hidden = blend_post(is_published=False)
+    comments = mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    assert _get(client, f"/api/posts/{post.id}/")["text"] == post.text
+    _get(client, f"/api/posts/{hidden.id}/", 404)
+    data = _get(client, f"/api/posts/{post.id}/comments/")
+    assert [row["id"] for row in data["results"]] == [
+        comment.id for comment in comments]
+    _get(client, f"/api/posts/{hidden.id}/comments/", 404)
+
+
+def test_categories_and_profiles(client, blend_post, mixer,
+                                 published_category):
+    mixer.blend("blog.Category", is_published=False)
+    post = blend_post()
+    blend_post(is_published=False)
+    data = _get(client, "/api/categories/")
+    assert [row["slug"] for row in data["results"]] == [
+        published_category.slug]
+    assert _get(client, f"/api/categories/{published_category.slug}/")[
+        "title"] == published_category.title
+    profile = _get(client, f"/api/profiles/{post.author.username}/")
+    assert profile["post_count"] == 1
+    assert "password" not in profile and "email" not in profile
+    _get(client, "/api/profiles/nobody/", 404)
+
+
+def test_read_only():
+    # Without a CSRF token, as API clients send requests.
+    client = Client(enforce_csrf_checks=True)
+    response = client.post("/api/posts/")
+    assert response.status_code == 405
+    assert response["Allow"] == "GET, HEAD"
+    assert response.json() == {"detail": "Метод не поддерживается."}
+
+
+@pytest.mark.parametrize(("view_name", "url"), [
+    ("api:post_list", "/api/posts/?fields=title,text"),
+    ("api:post_detail", "/api/posts/{post.id}/"),
+    ("api:comment_list", "/api/posts/{post.id}/comments/"),
+    ("api:category_list", "/api/categories/"),
+    ("api:category_detail", "/api/categories/{post.category.slug}/"),
+    ("api:profile_detail", "/api/profiles/{post.author.username}/"),
+])
+def test_query_budget(user_client, blend_post, mixer, user,
+                      assert_query_budget, view_name, url):
+    posts = [blend_post() for _ in range(15)]
+    mixer.cycle(15).blend("blog.Comment", post=posts[0], author=user)
+    assert_query_budget(user_client, url.format(post=posts[0]), view_name)
@@ -0,0 +1,43 @@
+import pytest
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def cached_post(client, post_with_published_location):
+    client.get("/")
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        title="Changed behind the cache")
+    return post_with_published_location
+
+
+def _index(client):
+    return client.get("/").content.decode("utf-8")
+
+
+def test_card_served_from_cache(client, cached_post):
+    content = _index(client)
+    assert cached_post.title in content
+    assert "Changed behind the cache" not in content
+
+
+def test_card_invalidated_by_author_rename(client, cached_post):
+    author = cached_post.author
+    author.username = "renamed_author"
+    author.save()
+    content = _index(client)
+    assert "@renamed_author" in content
+    assert "Changed behind the cache" in content
+
+
+def test_card_invalidated_by_category_change(client, cached_post):
+    category = cached_post.category
+    category.title = "New category title"
+    category.save()
+    assert "New category title" in _index(client)
+
+
+def test_card_invalidated_by_comment(client, mixer, cached_post):
+    mixer.blend("blog.Comment", post=cached_post)
+    assert "Комментарии (1)" in _index(client)
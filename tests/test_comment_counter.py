@@ -0,0 +1,51 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_counter_follows_comments(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2
+
+
+def test_counter_on_author_cascade(mixer, post_with_published_location):
+    post = post_with_published_location
+    commenter = mixer.blend("auth.User")
+    mixer.cycle(2).blend("blog.Comment", post=post, author=commenter)
+    mixer.blend("blog.Comment", post=post)
+    commenter.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(4).blend("blog.Comment", post=post)
+    Post.objects.update(comment_count=0)
+
+    call_command("recount_comments", batch_size=1)
+    post.refresh_from_db()
+    assert post.comment_count == Comment.objects.filter(post=post).count()
+
+
+def test_stale_save_keeps_counter(mixer, post_with_published_location):
+    post = post_with_published_location
+    stale = Post.objects.get(pk=post.pk)
+    mixer.blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(
+        derivatives_image="birthdays_images/ready.jpg")
+    stale.title = "Правка"
+    stale.save()
+    post.refresh_from_db()
+    assert post.title == "Правка"
+    assert post.comment_count == 1
+    assert post.derivatives_image == "birthdays_images/ready.jpg"
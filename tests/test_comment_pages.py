@@ -0,0 +1,46 @@
+import pytest
+
+from blog.views import COMMENTS_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+N_COMMENTS = COMMENTS_PER_PAGE + 5
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    # One line each: linebreaksbr would break multi-line texts with <br>.
+    return mixer.cycle(N_COMMENTS).blend(
+        "blog.Comment", post=post_with_published_location,
+        text=mixer.sequence("Комментарий номер {0}."))
+
+
+def test_detail_shows_first_comment_page(
+        client, post_with_published_location, many_comments):
+    post = post_with_published_location
+    comments = client.get(f"/posts/{post.id}/").context["comments"]
+    assert [c.id for c in comments] == [
+        c.id for c in many_comments[:COMMENTS_PER_PAGE]]
+    assert comments.has_next()
+
+
+def test_fragment_loads_next_page(
+        client, post_with_published_location, many_comments):
+    post = post_with_published_location
+    first = client.get(f"/posts/{post.id}/").context["comments"]
+    response = client.get(
+        f"/posts/{post.id}/comments/", {"cursor": first.next_cursor})
+    assert response.status_code == 200
+    rest = response.context["comments"]
+    assert [c.id for c in rest] == [
+        c.id for c in many_comments[COMMENTS_PER_PAGE:]]
+    assert not rest.has_next()
+    content = response.content.decode("utf-8")
+    assert "<html" not in content
+    assert many_comments[-1].text in content
+
+
+def test_fragment_of_hidden_post_not_found(client, mixer):
+    post = mixer.blend("blog.Post", is_published=False)
+    response = client.get(f"/posts/{post.id}/comments/")
+    assert response.status_code == 404
@@ -0,0 +1,67 @@
+import pytest
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+
+def test_post_detail_validators(client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.has_header("ETag") and response.has_header(
+        "Last-Modified")
+
+    repeat = _revalidate(client, url, response)
+    assert repeat.status_code == 304
+    assert not repeat.templates
+    assert client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+    ).status_code == 304
+
+
+def test_comments_change_post_etag(
+        client, mixer, user, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    response = client.get(url)
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user)
+    response = _revalidate(client, url, response)
+    assert response.status_code == 200
+
+    comment.text = "Исправленный текст"
+    comment.save()
+    assert _revalidate(client, url, response).status_code == 200
+    assert Post.objects.get().updated_at > comment.created_at
+
+
+def test_etag_differs_per_user(
+        user_client, another_user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    response = user_client.get(url)
+    assert _revalidate(another_user_client, url, response).status_code == 200
+
+
+def test_hidden_post_has_no_validators(client, post_with_published_location):
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert response.status_code == 404
+    assert not response.has_header("ETag")
+
+
+@pytest.mark.parametrize("url_template", [
+    "/", "/category/{post.category.slug}/",
+    "/profile/{post.author.username}/"])
+def test_feed_etag(client, mixer, post_with_published_location, url_template):
+    post = post_with_published_location
+    url = url_template.format(post=post)
+    response = client.get(url)
+    assert _revalidate(client, url, response).status_code == 304
+
+    mixer.blend("blog.Comment", post=post, author=post.author)
+    assert _revalidate(client, url, response).status_code == 200
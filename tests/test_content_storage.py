@@ -0,0 +1,92 @@
+import hashlib
+import re
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from blog.images import derivative_name
+from blog.models import ImageJob, Post
+from fixtures.images import image_bytes
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def _post(mixer, category, content, name="Photo.JPG"):
+    return mixer.blend(
+        "blog.Post", category=category, is_published=True,
+        image=SimpleUploadedFile(name, content))
+
+
+def test_upload_named_by_content_hash(media_root, mixer, published_category):
+    content = image_bytes()
+    post = _post(mixer, published_category, content)
+    digest = hashlib.sha256(content).hexdigest()
+    assert post.image.name == (
+        f"birthdays_images/{digest[:2]}/{digest[2:4]}/{digest}.jpg")
+    assert (media_root / post.image.name).read_bytes() == content
+
+
+def test_identical_uploads_deduplicated(media_root, mixer, published_category):
+    content = image_bytes()
+    first = _post(mixer, published_category, content, name="a.jpg")
+    second = _post(mixer, published_category, content, name="b.jpg")
+    other = _post(mixer, published_category, image_bytes(color=(0, 0, 0)))
+    assert first.image.name == second.image.name != other.image.name
+    originals = [
+        path for path in media_root.rglob("*.jpg")
+        if re.fullmatch(r"[0-9a-f]{64}\.jpg", path.name)]
+    assert len(originals) == 2
+    # The second post reuses the resized copies of the first one.
+    assert ImageJob.objects.filter(post=second).count() == 0
+    assert Post.objects.get(pk=second.pk).image_thumb.srcset
+
+
+def test_legacy_files_moved(media_root, mixer, published_category, capsys):
+    content = image_bytes()
+    legacy = default_storage.save(
+        "birthdays_images/legacy.jpg", ContentFile(content))
+    post = _post(mixer, published_category, image_bytes(color=(1, 2, 3)))
+    Post.objects.filter(pk=post.pk).update(image=legacy)
+    call_command("generate_thumbnails")
+    capsys.readouterr()
+
+    call_command("content_address_media", dry_run=True)
+    assert Post.objects.get().image.name == legacy
+    assert "Перенесено: 1" in capsys.readouterr().out
+
+    call_command("content_address_media")
+    post = Post.objects.get()
+    assert re.fullmatch(
+        r"birthdays_images/\w\w/\w\w/[0-9a-f]{64}\.jpg", post.image.name)
+    assert post.image_derivatives_ready
+    assert (media_root / post.image.name).read_bytes() == content
+    assert (media_root / derivative_name(post.image.name, "thumb")).exists()
+    assert not (media_root / legacy).exists()
+    assert not (media_root / derivative_name(legacy, "thumb")).exists()
+    assert "Перенесено: 1, совпало с уже загруженными: 0" in (
+        capsys.readouterr().out)
+
+
+def test_legacy_derivatives_moved_without_meta(
+        media_root, mixer, published_category):
+    legacy = default_storage.save(
+        "birthdays_images/legacy.jpg", ContentFile(image_bytes()))
+    post = _post(mixer, published_category, image_bytes(color=(1, 2, 3)))
+    Post.objects.filter(pk=post.pk).update(image=legacy)
+    call_command("generate_thumbnails")
+    old_files = sorted(
+        path.name for path in (media_root / "birthdays_images").iterdir()
+        if path.name.startswith("legacy_"))
+    assert any("_w" in name for name in old_files)
+    Post.objects.update(image_meta={})
+
+    call_command("content_address_media")
+    post = Post.objects.get()
+    root = post.image.name[:-len(".jpg")]
+    assert not any(
+        path.name.startswith("legacy")
+        for path in (media_root / "birthdays_images").iterdir())
+    for old in old_files:
+        assert (media_root / (root + old[len("legacy"):])).exists()
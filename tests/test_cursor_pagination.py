@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+N_POSTS = 25
+
+
+@pytest.fixture
+def many_posts(mixer, user, published_category):
+    now = timezone.now()
+    # Pairs of posts share pub_date to exercise the id tie-breaker.
+    pub_dates = (now - timedelta(hours=i // 2) for i in range(N_POSTS))
+    return mixer.cycle(N_POSTS).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_dates,
+    )
+
+
+def _walk(client, url, cursor_key):
+    seen, cursors = [], []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor})
+        assert response.status_code == 200
+        page_obj = response.context["page_obj"]
+        assert page_obj.is_cursor
+        seen.extend(post.id for post in page_obj)
+        cursors.append(cursor)
+        cursor = getattr(page_obj, cursor_key)
+    return seen, cursors
+
+
+def test_cursor_pages_cover_feed(client, many_posts):
+    seen, _ = _walk(client, "/", "next_cursor")
+    expected = [
+        post.id for post in sorted(
+            many_posts, key=lambda p: (p.pub_date, p.id), reverse=True)
+    ]
+    assert seen == expected
+
+
+def test_cursor_previous_returns_same_page(client, many_posts):
+    first = client.get("/", {"cursor": ""}).context["page_obj"]
+    second = client.get(
+        "/", {"cursor": first.next_cursor}).context["page_obj"]
+    back = client.get(
+        "/", {"cursor": second.previous_cursor}).context["page_obj"]
+    assert [p.id for p in back] == [p.id for p in first]
+    assert not back.has_previous()
+
+
+def test_invalid_cursor_falls_back_to_first_page(client, many_posts):
+    response = client.get("/", {"cursor": "garbage!"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == 10
+
+
+def test_cursor_mode_setting(client, many_posts):
+    with override_settings(BLOG_CURSOR_PAGINATION=True):
+        response = client.get("/")
+    assert response.context["page_obj"].is_cursor
+    assert "?cursor=" in response.content.decode("utf-8")
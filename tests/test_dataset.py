@@ -0,0 +1,53 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F
+
+from blog.dataset import DatasetGenerator, dataset_sizes
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_generate_dataset_command(capsys):
+    call_command("generate_dataset", posts=300, batch_size=64, seed=1)
+    out = capsys.readouterr().out
+    assert "posts: 300" in out
+    assert "в секунду" in out
+    assert Post.objects.count() == 300
+    assert not Post.objects.annotate(
+        comments=Count("comment")).exclude(
+        comment_count=F("comments")).exists()
+    assert Comment.objects.count() == sum(
+        Post.objects.values_list("comment_count", flat=True))
+
+
+def test_visibility_and_dates():
+    DatasetGenerator(dataset_sizes(2000), seed=2).generate()
+    posts = Post.objects.select_related("category")
+    generator_now = max(post.created_at for post in posts)
+    scheduled = [post for post in posts if post.pub_date > generator_now]
+    unpublished = [post for post in posts if not post.is_published]
+    assert scheduled and unpublished
+    assert not any(post.is_visible for post in scheduled + unpublished)
+    for post in posts:
+        assert post.is_visible == (
+            post.is_published and post.pub_date <= generator_now
+            and post.category.is_published)
+    # bulk_create() must not overwrite the generated dates.
+    assert len({post.created_at for post in posts}) > 1000
+    assert not Comment.objects.filter(
+        created_at__lt=F("post__pub_date")).exists()
+
+
+def test_same_seed_same_data():
+    def titles():
+        return list(Post.objects.order_by("pk").values_list("title", "text"))
+
+    DatasetGenerator(dataset_sizes(100), seed=3, index=False).generate()
+    first = titles()
+    for model in (Comment, Post):
+        model.objects.all().delete()
+    DatasetGenerator(dataset_sizes(100), seed=3, index=False).generate()
+    assert titles()[-100:] == first
+    DatasetGenerator(dataset_sizes(100), seed=4, index=False).generate()
+    assert titles()[-100:] != first
@@ -0,0 +1,63 @@
+import gzip
+import json
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core import serializers
+from django.core.management import call_command
+
+from blog.models import Category, Comment, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def dataset(mixer, user, published_category, published_location):
+    posts = mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location, is_published=True)
+    mixer.cycle(2).blend("blog.Comment", post=posts[0], author=user)
+    user.groups.add(Group.objects.create(name="Авторы"))
+    return posts
+
+
+def _lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def test_jsonl_gzip(tmp_path, dataset, user, capsys):
+    call_command("export_blog_dump", str(tmp_path), compress=True,
+                 workers=0, chunk_size=2)
+    assert "Выгружено объектов: 8" in capsys.readouterr().out
+    posts = _lines(tmp_path / "blog.post.jsonl.gz")
+    assert [obj["pk"] for obj in posts] == [post.pk for post in dataset]
+    fields = posts[0]["fields"]
+    assert fields["author"] == user.pk
+    assert fields["title"] == dataset[0].title
+    assert fields["image_meta"] == dataset[0].image_meta
+    users = _lines(tmp_path / "auth.user.jsonl.gz")
+    assert users[0]["fields"]["groups"] == [Group.objects.get().pk]
+    assert len(_lines(tmp_path / "blog.comment.jsonl.gz")) == 2
+
+
+def test_json_array_readable_by_django(tmp_path, dataset):
+    call_command("export_blog_dump", str(tmp_path), dump_format="json",
+                 models=["blog.post"], workers=0)
+    with open(tmp_path / "blog.post.json", encoding="utf-8") as file:
+        objects = [item.object for item in serializers.deserialize(
+            "json", file.read())]
+    assert objects == dataset
+
+
+def test_round_trip(tmp_path, dataset):
+    call_command("export_blog_dump", str(tmp_path), compress=True, workers=0)
+    counts = {model: model.objects.count()
+              for model in (Category, Location, Post, Comment)}
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    Location.objects.all().delete()
+    call_command("import_blog_dump", str(tmp_path), ignore_conflicts=True)
+    assert {model: model.objects.count() for model in counts} == counts
+    post = Post.objects.get(pk=dataset[0].pk)
+    assert post.is_visible and post.comment_count == 2
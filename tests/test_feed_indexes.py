@@ -0,0 +1,63 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.management.commands.explain_feeds import feed_querysets
+from blog.views import sort_posts
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite"
+    ),
+]
+
+EXPECTED_INDEXES = {
+    "index": "post_visible_pub_date_idx",
+    "category_posts": "post_category_pub_date_idx",
+    "profile": "post_author_pub_date_idx",
+}
+
+
+def test_feeds_use_composite_indexes(mixer, published_category, user):
+    mixer.cycle(5).blend(
+        "blog.Post", category=published_category, author=user)
+    plans = {
+        name: sort_posts(queryset)[:10].explain()
+        for name, queryset in feed_querysets()
+    }
+    assert plans.keys() == EXPECTED_INDEXES.keys()
+    for name, index_name in EXPECTED_INDEXES.items():
+        assert index_name in plans[name], plans[name]
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plans[name], plans[name]
+
+
+def test_explain_feeds_command(mixer, published_category, capsys):
+    mixer.blend("blog.Post", category=published_category)
+    call_command("explain_feeds", repeat=1)
+    assert "post_visible_pub_date_idx" in capsys.readouterr().out
+
+
+def test_explained_queries_match_views(
+        mixer, client, published_category, user):
+    mixer.cycle(5).blend(
+        "blog.Post", category=published_category, author=user)
+    urls = {
+        "index": "/",
+        "category_posts": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }
+    for name, queryset in feed_querysets():
+        with CaptureQueriesContext(connection) as explained:
+            list(sort_posts(queryset)[:10])
+        with CaptureQueriesContext(connection) as view:
+            client.get(urls[name])
+        # The paginator trims LIMIT to the number of posts.
+        assert _without_limit(explained[0]["sql"]) in [
+            _without_limit(query["sql"]) for query in view
+        ], name
+
+
+def _without_limit(sql):
+    return sql.split(" LIMIT ")[0]
@@ -0,0 +1,103 @@
+from xml.etree import ElementTree
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.feeds import FEED_ITEMS
+
+pytestmark = [pytest.mark.django_db]
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category):
+    def blend(**kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("category", published_category)
+        kwargs.setdefault("author", user)
+        return mixer.blend("blog.Post", **kwargs)
+    return blend
+
+
+def _rss_links(response):
+    assert response.status_code == 200
+    channel = ElementTree.fromstring(response.content).find("channel")
+    return [item.findtext("link") for item in channel.iter("item")]
+
+
+def test_site_feed_lists_newest_visible_posts(client, blend_post):
+    posts = [blend_post() for _ in range(FEED_ITEMS + 2)]
+    hidden = blend_post(is_published=False)
+    links = _rss_links(client.get("/feed/rss/"))
+    assert len(links) == FEED_ITEMS
+    assert not any(link.endswith(f"/posts/{hidden.id}/") for link in links)
+    newest = max(posts, key=lambda post: post.pub_date)
+    assert links[0].endswith(f"/posts/{newest.id}/")
+
+
+def test_summary_is_truncated(client, blend_post):
+    blend_post(text="слово " * 1000)
+    item = ElementTree.fromstring(
+        client.get("/feed/rss/").content).find("channel/item")
+    assert len(item.findtext("description")) <= 300
+
+
+def test_atom_feed(client, blend_post):
+    post = blend_post()
+    response = client.get("/feed/atom/")
+    assert response["Content-Type"].startswith("application/atom+xml")
+    entry = ElementTree.fromstring(response.content).find(f"{ATOM}entry")
+    assert entry.findtext(f"{ATOM}title") == post.title
+    assert entry.find(f"{ATOM}updated") is not None
+
+
+def test_category_and_author_feeds(
+        client, blend_post, mixer, another_user, published_category):
+    other_category = mixer.blend("blog.Category", is_published=True)
+    post = blend_post()
+    blend_post(category=other_category)
+    blend_post(author=another_user)
+    category_links = _rss_links(
+        client.get(f"/category/{published_category.slug}/feed/rss/"))
+    author_links = _rss_links(
+        client.get(f"/profile/{post.author.username}/feed/rss/"))
+    assert len(category_links) == 2
+    assert len(author_links) == 2
+    assert client.get(
+        f"/profile/{another_user.username}/feed/atom/").status_code == 200
+
+
+def test_missing_feeds(client, mixer):
+    hidden = mixer.blend("blog.Category", is_published=False)
+    assert client.get(f"/category/{hidden.slug}/feed/rss/").status_code == 404
+    assert client.get("/profile/nobody/feed/rss/").status_code == 404
+
+
+def test_feed_cached_until_post_changes(client, blend_post):
+    post = blend_post(title="Первая")
+    response = client.get("/feed/rss/")
+    assert response.has_header("Last-Modified")
+    with CaptureQueriesContext(connection) as ctx:
+        assert client.get("/feed/rss/").content == response.content
+    assert len(ctx.captured_queries) == 0
+    assert client.get(
+        "/feed/rss/", HTTP_IF_NONE_MATCH=response["ETag"]
+    ).status_code == 304
+
+    post.title = "Исправленная"
+    post.save()
+    changed = client.get("/feed/rss/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert changed.status_code == 200
+    assert "Исправленная" in changed.content.decode()
+
+
+def test_other_category_does_not_invalidate(
+        client, blend_post, mixer, published_category):
+    url = f"/category/{published_category.slug}/feed/rss/"
+    blend_post()
+    response = client.get(url)
+    blend_post(category=mixer.blend("blog.Category", is_published=True))
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
@@ -0,0 +1,55 @@
+import pytest
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import DERIVATIVE_SIZES, derivative_name
+from blog.jobs import process_image
+from blog.models import Post
+from blog.storage import ContentAddressedStorage
+from fixtures.images import image_upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def test_derivatives_generated_on_save(media_root, post_with_image):
+    for size, box in DERIVATIVE_SIZES.items():
+        path = media_root / derivative_name(post_with_image.image.name, size)
+        with Image.open(path) as derivative:
+            assert derivative.width == box[0]
+            assert derivative.height < box[1]
+
+
+def test_templates_use_derivatives(client, mixer, post_with_image):
+    post_with_image.refresh_from_db()
+    comment = mixer.blend("blog.Comment", post=post_with_image)
+    index = client.get("/").content.decode("utf-8")
+    assert post_with_image.image_thumb.url in index
+    detail = client.get(f"/posts/{post_with_image.id}/").content.decode()
+    assert post_with_image.image_medium.url in detail
+    assert f'name="comment_{comment.id}"' in detail
+
+
+def test_backfill_command(media_root, post_with_image, capsys):
+    thumb = media_root / derivative_name(post_with_image.image.name, "thumb")
+    thumb.unlink()
+    Post.objects.update(derivatives_image="")
+    call_command("generate_thumbnails")
+    assert Post.objects.get().image_derivatives_ready
+    assert thumb.exists()
+    assert "Обработано изображений: 1" in capsys.readouterr().out
+
+    Post.objects.update(image="birthdays_images/missing.jpg")
+    call_command("generate_thumbnails")
+    assert "ошибок: 1" in capsys.readouterr().out
+
+
+def test_derivatives_written_through_image_storage(
+        monkeypatch, media_root, tmp_path_factory):
+    storage = ContentAddressedStorage(
+        location=tmp_path_factory.mktemp("images"))
+    monkeypatch.setattr(Post.image.field, "storage", storage)
+    name = storage.save("birthdays_images/photo.jpg", image_upload())
+    process_image(name)
+    for size in DERIVATIVE_SIZES:
+        assert storage.exists(derivative_name(name, size))
+        assert not (media_root / derivative_name(name, size)).exists()
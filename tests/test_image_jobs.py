@@ -0,0 +1,61 @@
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.images import derivative_name
+from blog.jobs import MAX_ATTEMPTS, claim_image_jobs
+from blog.models import ImageJob, Post
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+@pytest.fixture(autouse=True)
+def queued_image_jobs(settings, media_root):
+    settings.BLOG_IMAGE_JOBS_EAGER = False
+
+
+def test_upload_enqueues_job_and_falls_back(client, post_with_image):
+    job = ImageJob.objects.get()
+    assert job.status == ImageJob.PENDING
+    assert job.image == post_with_image.image.name
+    assert post_with_image.image_thumb.url == post_with_image.image.url
+    content = client.get("/").content.decode("utf-8")
+    assert f'src="{post_with_image.image.url}"' in content
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_worker_processes_jobs(
+        client, media_root, post_with_image, workers, capsys):
+    client.get("/")
+    call_command("process_image_jobs", workers=workers)
+    assert "Обработано: 1, ошибок: 0" in capsys.readouterr().out
+    assert ImageJob.objects.get().status == ImageJob.DONE
+
+    post = Post.objects.get()
+    assert post.image_derivatives_ready
+    assert (media_root / derivative_name(post.image.name, "thumb")).exists()
+    content = client.get("/").content.decode("utf-8")
+    assert f'src="{post.image_thumb.url}"' in content
+
+
+def test_failing_job_retried_then_failed(post_with_image, capsys):
+    Post.objects.update(image="birthdays_images/missing.jpg")
+    ImageJob.objects.update(image="birthdays_images/missing.jpg")
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        call_command("process_image_jobs", workers=0)
+        job = ImageJob.objects.get()
+        assert job.attempts == attempt
+        if attempt < MAX_ATTEMPTS:
+            # Not claimed again until its retry time has come.
+            assert job.status == ImageJob.PENDING
+            assert job.retry_after > timezone.now()
+            assert claim_image_jobs(10) == []
+            ImageJob.objects.update(retry_after=timezone.now())
+    assert job.status == ImageJob.FAILED
+    assert job.attempts == MAX_ATTEMPTS
+    assert not Post.objects.get().image_derivatives_ready
+
+
+def test_claim_is_exclusive(post_with_image):
+    assert len(claim_image_jobs(10)) == 1
+    assert claim_image_jobs(10) == []
@@ -0,0 +1,65 @@
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from PIL import ExifTags, Image
+
+from blog.caching import FEED_GENERATION_KEY
+from blog.images import scaled_size
+from blog.models import Post
+from fixtures.images import image_upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def test_meta_stored_on_upload(post_with_image):
+    post = Post.objects.get()
+    assert post.image_meta["width"] == 1600
+    assert post.image_meta["height"] == 1000
+    assert post.image_meta["size"] == post.image.size
+
+
+def test_exif_rotation_swaps_dimensions(mixer, published_category):
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    post = mixer.blend(
+        "blog.Post", category=published_category,
+        image=image_upload(exif=exif))
+    assert (post.image_meta["width"], post.image_meta["height"]) == (
+        1000, 1600)
+
+
+def test_img_tags_are_dimensioned_and_lazy(client, post_with_image):
+    post = Post.objects.get()
+    thumb, medium = post.image_thumb, post.image_medium
+    assert (thumb.width, thumb.height) == (640, 400)
+    assert (medium.width, medium.height) == (1280, 800)
+    index = client.get("/").content.decode("utf-8")
+    assert f'src="{thumb.url}"' in index
+    assert ('width="640" height="400" '
+            'loading="lazy" decoding="async"') in index
+    detail = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert 'width="1280" height="800"' in detail
+
+
+@pytest.mark.parametrize(
+    "size, box", [((3000, 2000), (640, 640)), ((333, 1000), (640, 640)),
+                  ((500, 300), (640, 640)), ((1999, 1001), (1280, 1280))])
+def test_scaled_size_matches_pillow(size, box):
+    image = Image.new("RGB", size)
+    image.thumbnail(box)
+    assert scaled_size(*size, box) == image.size
+
+
+def test_backfill_command(post_with_image, capsys):
+    Post.objects.update(image_meta={})
+    feed_generation = cache.get(FEED_GENERATION_KEY)
+    call_command("backfill_image_meta", workers=2)
+    assert "Обновлено: 1, ошибок: 0" in capsys.readouterr().out
+    # Cached feed pages lack the width and height of the image.
+    assert cache.get(FEED_GENERATION_KEY) != feed_generation
+    assert Post.objects.get().image_meta["width"] == 1600
+
+    Post.objects.update(
+        image="birthdays_images/missing.jpg", image_meta={})
+    call_command("backfill_image_meta")
+    assert "Обновлено: 0, ошибок: 1" in capsys.readouterr().out
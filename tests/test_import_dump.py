@@ -0,0 +1,129 @@
+import gzip
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from blog.dumps import iter_dump_objects
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parents[1] / "db.json"
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 1 << 16])
+def test_iter_dump_objects(read_size):
+    objects = [{"n": i, "text": "скобки ] } , и [ {"} for i in range(5)]
+    array = json.dumps(objects, ensure_ascii=False, indent=2)
+    lines = "".join(json.dumps(obj) + "\n" for obj in objects)
+    for dump in (array, lines, "[]", ""):
+        expected = objects if dump not in ("[]", "") else []
+        assert list(iter_dump_objects(
+            io.StringIO(dump), read_size)) == expected
+
+
+def test_broken_dump():
+    with pytest.raises(ValueError):
+        list(iter_dump_objects(io.StringIO('[{"a": 1}, {"b": '), 4))
+
+
+def test_import_db_json(client, capsys):
+    call_command("import_blog_dump", str(DB_JSON), batch_size=7)
+    out = capsys.readouterr().out
+    assert "blog.post: 39" in out
+    assert "Пропущено объектов других моделей: 112" in out
+    assert "в секунду" in out
+    assert Category.objects.count() == 6
+    expected_visible = Post.objects.filter(
+        is_published=True, category__is_published=True).count()
+    assert Post.objects.filter(is_visible=True).count() == expected_visible
+    post = Post.objects.filter(is_visible=True).first()
+    response = client.get("/search/", {"q": post.title})
+    assert post in response.context["page_obj"].object_list
+
+
+def test_jsonl_gzip_with_comments(tmp_path, user, published_category):
+    dump = tmp_path / "dump.jsonl.gz"
+    objects = [
+        {"model": "blog.post", "pk": 100, "fields": {
+            "title": "Из дампа", "text": "Текст", "is_published": True,
+            "created_at": "2023-01-01T00:00:00Z",
+            "pub_date": "2023-01-01T00:00:00Z", "author": user.id,
+            "category": published_category.id, "location": None}},
+    ] + [
+        {"model": "blog.comment", "pk": pk, "fields": {
+            "text": "Комментарий", "post": 100, "author": user.id,
+            "created_at": "2023-01-02T00:00:00Z"}}
+        for pk in range(1, 4)
+    ]
+    with gzip.open(dump, "wt", encoding="utf-8") as file:
+        file.writelines(json.dumps(obj) + "\n" for obj in objects)
+    call_command("import_blog_dump", str(dump), batch_size=2)
+    post = Post.objects.get(pk=100)
+    assert post.is_visible
+    assert post.comment_count == 3
+    assert Comment.objects.count() == 3
+
+
+def test_conflicts(tmp_path, published_category):
+    dump = tmp_path / "dump.json"
+    dump.write_text(json.dumps([{
+        "model": "blog.category", "pk": published_category.pk, "fields": {
+            "title": "Другая", "description": "", "slug": "other",
+            "is_published": True, "created_at": "2023-01-01T00:00:00Z"}}]))
+    call_command("import_blog_dump", str(dump), ignore_conflicts=True)
+    assert Category.objects.get().slug == published_category.slug
+    with pytest.raises(CommandError):
+        call_command("import_blog_dump", str(dump))
+
+
+def test_dates_are_kept(tmp_path, user, published_category):
+    dump = tmp_path / "dump.jsonl"
+    objects = [
+        {"model": "blog.post", "pk": 100, "fields": {
+            "title": "Старая", "text": "Текст", "is_published": True,
+            "created_at": "2020-01-01T00:00:00Z",
+            "updated_at": "2020-01-01T12:00:00Z",
+            "pub_date": "2020-01-01T00:00:00Z", "author": user.id,
+            "category": published_category.id, "location": None}},
+        {"model": "blog.comment", "pk": 1, "fields": {
+            "text": "Первый", "post": 100, "author": user.id,
+            "created_at": "2020-01-03T00:00:00Z"}},
+        {"model": "blog.comment", "pk": 2, "fields": {
+            "text": "Второй", "post": 100, "author": user.id,
+            "created_at": "2020-01-02T00:00:00Z"}},
+        {"model": "blog.comment", "pk": 3, "fields": {
+            "text": "Без даты", "post": 100, "author": user.id}},
+    ]
+    dump.write_text("".join(json.dumps(obj) + "\n" for obj in objects))
+    call_command("import_blog_dump", str(dump))
+    post = Post.objects.get(pk=100)
+    assert post.created_at.isoformat() == "2020-01-01T00:00:00+00:00"
+    assert post.updated_at.isoformat() == "2020-01-01T12:00:00+00:00"
+    dates = dict(Comment.objects.values_list("pk", "created_at"))
+    assert dates[1].isoformat() == "2020-01-03T00:00:00+00:00"
+    assert dates[2].isoformat() == "2020-01-02T00:00:00+00:00"
+    assert dates[3].year > 2020
+    # Dates are switched back on after the import.
+    comment = Comment.objects.create(text="Новый", post=post, author=user)
+    assert comment.created_at.year > 2020
+
+
+def test_conflicting_posts_keep_their_index(
+        client, tmp_path, post_with_published_location):
+    post = post_with_published_location
+    dump = tmp_path / "dump.jsonl"
+    dump.write_text(json.dumps({
+        "model": "blog.post", "pk": post.pk, "fields": {
+            "title": "Заголовокиздампа", "text": "Текст",
+            "is_published": True, "created_at": "2020-01-01T00:00:00Z",
+            "pub_date": "2020-01-01T00:00:00Z", "author": post.author_id,
+            "category": post.category_id, "location": None}}) + "\n")
+    call_command("import_blog_dump", str(dump), ignore_conflicts=True)
+    response = client.get("/search/", {"q": "Заголовокиздампа"})
+    assert not response.context["page_obj"].object_list
+    response = client.get("/search/", {"q": post.title})
+    assert post in response.context["page_obj"].object_list
@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+from django.core.management import call_command
+
+from blog.images import derivative_name, derivative_names
+from blog.management.commands import collect_orphaned_media
+from blog.models import Post
+from fixtures.images import image_upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+@pytest.fixture
+def posts(mixer, published_category):
+    kept, dropped = (
+        mixer.blend("blog.Post", category=published_category,
+                    image=image_upload(size=(700, 500), color=color))
+        for color in ((10, 10, 10), (200, 200, 200))
+    )
+    dropped_meta = Post.objects.get(pk=dropped.pk).image_meta
+    dropped_files = [dropped.image.name, *derivative_names(
+        dropped.image.name, dropped_meta["variants"])]
+    dropped.delete()
+    return Post.objects.get(pk=kept.pk), dropped_files
+
+
+def _age(media_root, seconds=7200):
+    past = time.time() - seconds
+    for path in media_root.rglob("*"):
+        os.utime(path, (past, past))
+
+
+def test_dry_run_keeps_files(media_root, posts, capsys):
+    _, dropped_files = posts
+    _age(media_root)
+    call_command("collect_orphaned_media", dry_run=True)
+    assert f"Найдено лишних: {len(dropped_files)}" in capsys.readouterr().out
+    assert all((media_root / name).exists() for name in dropped_files)
+
+
+def test_orphans_removed(media_root, posts, capsys):
+    kept, dropped_files = posts
+    _age(media_root)
+    call_command("collect_orphaned_media", batch_size=3)
+    assert f"Убрано лишних: {len(dropped_files)}" in capsys.readouterr().out
+    assert not any((media_root / name).exists() for name in dropped_files)
+    assert (media_root / kept.image.name).exists()
+    assert (media_root / derivative_name(kept.image.name, "thumb")).exists()
+
+
+def test_recent_files_skipped(media_root, posts, capsys):
+    call_command("collect_orphaned_media")
+    assert "Убрано лишних: 0" in capsys.readouterr().out
+
+
+def test_quarantine(media_root, tmp_path, posts):
+    _, dropped_files = posts
+    _age(media_root)
+    call_command("collect_orphaned_media", quarantine=tmp_path / "q")
+    for name in dropped_files:
+        assert not (media_root / name).exists()
+        assert (tmp_path / "q" / name).exists()
+
+
+def test_file_taken_during_scan_kept(
+        media_root, posts, mixer, published_category, monkeypatch):
+    _, dropped_files = posts
+    _age(media_root)
+    scan = collect_orphaned_media._scan
+
+    def scan_then_save(path):
+        entries = list(scan(path))
+        # An identical re-upload reuses the file and keeps its old mtime.
+        mixer.blend(
+            "blog.Post", category=published_category, image=dropped_files[0])
+        yield from entries
+
+    monkeypatch.setattr(collect_orphaned_media, "_scan", scan_then_save)
+    call_command("collect_orphaned_media")
+    assert all((media_root / name).exists() for name in dropped_files)
@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+
+from blog.caching import get_page_cache_stats
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _x_cache(client, url="/"):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get("X-Cache")
+
+
+def test_anonymous_index_cached(client, post_with_published_location):
+    assert _x_cache(client) == "MISS"
+    assert _x_cache(client) == "HIT"
+    assert _x_cache(client, "/?page=2") == "MISS"
+    assert get_page_cache_stats() == {"hits": 1, "misses": 2}
+
+
+def test_authenticated_not_cached(user_client, post_with_published_location):
+    assert _x_cache(user_client) is None
+
+
+def test_visible_post_invalidates(
+        client, mixer, user, published_category,
+        post_with_published_location):
+    _x_cache(client)
+    mixer.blend("blog.Post", category=published_category, is_published=False)
+    assert _x_cache(client) == "HIT"
+    post = mixer.blend(
+        "blog.Post", category=published_category, is_published=True,
+        pub_date=post_with_published_location.pub_date)
+    assert _x_cache(client) == "MISS"
+    post.is_published = False
+    post.save()
+    assert _x_cache(client) == "MISS"
+
+
+def test_category_page_invalidation(
+        client, mixer, published_category, another_category,
+        post_with_published_location):
+    url = f"/category/{published_category.slug}/"
+    other_url = f"/category/{another_category.slug}/"
+    _x_cache(client, url)
+    _x_cache(client, other_url)
+    post_with_published_location.title = "Edited title"
+    post_with_published_location.save()
+    assert _x_cache(client, url) == "MISS"
+    assert _x_cache(client, other_url) == "HIT"
+
+    published_category.is_published = False
+    published_category.save()
+    assert client.get(url).status_code == 404
+
+
+def test_page_cache_stats_command(
+        client, manage_in_subprocess, post_with_published_location):
+    _x_cache(client)
+    _x_cache(client)
+    output = manage_in_subprocess("page_cache_stats", "--reset")
+    assert "Попаданий: 1, промахов: 1" in output
+    assert get_page_cache_stats() == {"hits": 0, "misses": 0}
+
+
+def test_recount_invalidates_cached_pages(
+        client, post_with_published_location):
+    response = client.get("/")
+    Post.objects.update(comment_count=7)
+    assert _x_cache(client) == "HIT"
+    call_command("recount_comments")
+    refreshed = client.get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert refreshed.status_code == 200
+    assert refreshed["X-Cache"] == "MISS"
+    assert "Комментарии (7)" not in refreshed.content.decode()
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+from blog.paginators import CachedCountPaginator
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    return mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True)
+
+
+def _count_queries(client, url="/"):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(url)
+    return [q["sql"] for q in ctx.captured_queries if "COUNT(" in q["sql"]]
+
+
+def test_count_cached_until_feed_changes(
+        user_client, mixer, published_category, posts):
+    assert len(_count_queries(user_client)) == 1
+    assert _count_queries(user_client) == []
+
+    mixer.blend(
+        "blog.Post", category=published_category, is_published=True)
+    assert len(_count_queries(user_client)) == 1
+
+
+def test_profile_counts_split_by_viewer(
+        user_client, another_user_client, user, posts):
+    url = f"/profile/{user.username}/"
+    assert len(_count_queries(user_client, url)) == 1
+    assert len(_count_queries(another_user_client, url)) == 1
+    assert _count_queries(another_user_client, url) == []
+
+
+@override_settings(BLOG_APPROXIMATE_COUNT_LIMIT=5)
+def test_approximate_count(user_client, posts):
+    paginator = user_client.get("/").context["page_obj"].paginator
+    assert paginator.count == 5
+    assert paginator.count_is_approximate
+
+
+def test_page_window_is_bounded(posts):
+    paginator = CachedCountPaginator(Post.objects.order_by("pk"), 1)
+    assert paginator.get_page(1).page_window == [
+        1, 2, 3, paginator.ELLIPSIS, 12]
+    assert paginator.get_page(6).page_window == [
+        1, paginator.ELLIPSIS, 4, 5, 6, 7, 8, paginator.ELLIPSIS, 12]
+
+
+def test_ellipsis_rendered(user_client, mixer, published_category, posts):
+    mixer.cycle(50).blend(
+        "blog.Post", category=published_category, is_published=True)
+    content = user_client.get("/").content.decode("utf-8")
+    assert "…" in content
+    assert '?page=3"' in content
+    assert '?page=4"' not in content
+
+
+@override_settings(BLOG_APPROXIMATE_COUNT_LIMIT=5)
+def test_pages_past_approximate_count(user_client, posts):
+    paginator = CachedCountPaginator(
+        Post.objects.order_by("pk"), 2, count_limit=5)
+    assert paginator.num_pages == 3
+    page = paginator.get_page(3)
+    assert page.has_next()
+    assert page.next_page_number() == 4
+    last = paginator.get_page(6)
+    assert list(last) == list(Post.objects.order_by("pk")[10:12])
+    assert not last.has_next()
+    assert last.page_window == [1, paginator.ELLIPSIS, 4, 5, 6]
+    assert paginator.get_page(7).number == 3
+
+    # Ten posts a page: the limit of five covers only the first one.
+    first = user_client.get("/")
+    assert first.context["page_obj"].has_next()
+    assert '?page=2"' in first.content.decode("utf-8")
+    assert "Последняя" not in first.content.decode("utf-8")
+    second = user_client.get("/", {"page": 2}).context["page_obj"]
+    assert len(second) == 2
+    assert not second.has_next()
@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from blog.middleware import QueryBudgetExceeded, QueryBudgetMiddleware
+from blog.models import Post
+from blog.scheduling import reset_schedule
+from blog.urls import app_name, urlpatterns
+
+pytestmark = [pytest.mark.django_db]
+
+SMALL, LARGE = 1, 15
+
+VIEWS = [
+    ("blog:index", "get", "/"),
+    ("blog:post_detail", "get", "/posts/{post.id}/"),
+    ("blog:post_comments", "get", "/posts/{post.id}/comments/"),
+    ("blog:create_post", "get", "/posts/create/"),
+    ("blog:search", "get", "/search/?q={post.title}"),
+    ("blog:feed_rss", "get", "/feed/rss/"),
+    ("blog:feed_atom", "get", "/feed/atom/"),
+    ("blog:category_feed_rss", "get",
+     "/category/{post.category.slug}/feed/rss/"),
+    ("blog:category_feed_atom", "get",
+     "/category/{post.category.slug}/feed/atom/"),
+    ("blog:profile_feed_rss", "get",
+     "/profile/{post.author.username}/feed/rss/"),
+    ("blog:profile_feed_atom", "get",
+     "/profile/{post.author.username}/feed/atom/"),
+    ("blog:category_posts", "get", "/category/{post.category.slug}/"),
+    ("blog:edit_profile", "get", "/profile/edit/"),
+    ("blog:profile", "get", "/profile/{post.author.username}/"),
+    ("blog:edit_post", "get", "/posts/{post.id}/edit/"),
+    ("blog:delete_post", "get", "/posts/{post.id}/delete/"),
+    ("blog:add_comment", "post", "/posts/{post.id}/comment/"),
+    ("blog:edit_comment", "get",
+     "/posts/{post.id}/edit_comment/{comment.id}/"),
+    ("blog:delete_comment", "get",
+     "/posts/{post.id}/delete_comment/{comment.id}/"),
+]
+
+
+def test_every_blog_url_has_a_budget():
+    view_names = {f"{app_name}:{pattern.name}" for pattern in urlpatterns}
+    assert view_names == {name for name, _, _ in VIEWS}
+    assert view_names <= settings.QUERY_BUDGETS.keys()
+
+
+@pytest.mark.parametrize(
+    ("view_name", "method", "url"), VIEWS, ids=[v[0] for v in VIEWS])
+def test_query_budget_independent_of_size(
+        view_name, method, url, mixer, user, user_client, client,
+        published_category, assert_query_budget):
+    def blend(n):
+        posts = mixer.cycle(n).blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True)
+        post = Post.objects.order_by("pk").first()
+        comments = mixer.cycle(n).blend(
+            "blog.Comment", post=post, author=user)
+        return post, comments[0]
+
+    post, comment = blend(SMALL)
+    page_url = url.format(post=post, comment=comment)
+    assert resolve(page_url.split("?")[0]).view_name == view_name
+    data = {"text": "Comment"} if method == "post" else None
+    counts = []
+    for extra in (0, LARGE):
+        if extra:
+            blend(extra)
+        cache.clear()
+        counts.append(assert_query_budget(
+            user_client, page_url, view_name, method, data))
+    assert counts[0] == counts[1], (
+        f"{view_name}: query count grows with data size: {counts}")
+
+
+def _budget_middleware(n_queries):
+    def view(request):
+        for _ in range(n_queries):
+            Post.objects.exists()
+        return HttpResponse()
+
+    def get_response(request):
+        request.resolver_match = resolve("/")
+        return view(request)
+    return QueryBudgetMiddleware(get_response)
+
+
+@override_settings(
+    QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION="raise",
+    QUERY_BUDGETS={"blog:index": 2})
+def test_middleware_raises_over_budget():
+    request = RequestFactory().get("/")
+    assert _budget_middleware(2)(request)["X-Query-Count"] == "2"
+    with pytest.raises(QueryBudgetExceeded):
+        _budget_middleware(3)(request)
+
+
+@override_settings(
+    QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION="log",
+    QUERY_BUDGETS={"blog:index": 1})
+def test_middleware_logs_over_budget(caplog):
+    _budget_middleware(2)(RequestFactory().get("/"))
+    assert "made 2 queries, budget is 1" in caplog.text
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION="raise")
+@pytest.mark.parametrize("url", ["/", "/category/{post.category.slug}/"])
+def test_promoting_due_post_not_counted(
+        url, client, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1))
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1), is_visible=False)
+    reset_schedule()
+    response = client.get(url.format(post=post))
+    assert post.title in response.content.decode("utf-8")
+    assert int(response["X-Query-Count"]) <= settings.QUERY_BUDGETS[
+        response.resolver_match.view_name]
@@ -0,0 +1,74 @@
+import pytest
+from django.core.management import call_command
+from PIL import Image
+
+from blog.images import responsive_name, responsive_widths
+from blog.models import Post
+from fixtures.images import image_upload
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def _post(mixer, category, **kwargs):
+    mixer.blend(
+        "blog.Post", category=category, is_published=True,
+        image=image_upload(**kwargs))
+    return Post.objects.get()
+
+
+def test_responsive_widths():
+    assert responsive_widths(3000) == [320, 640, 960, 1280]
+    assert responsive_widths(1280) == [320, 640, 960, 1280]
+    assert responsive_widths(500) == [320, 500]
+    assert responsive_widths(200) == [200]
+
+
+def test_variants_written(media_root, mixer, published_category):
+    post = _post(mixer, published_category)
+    variants = post.image_meta["variants"]
+    assert variants == {"widths": [320, 640, 960, 1280], "formats": ["WEBP"]}
+    for width in variants["widths"]:
+        with Image.open(
+                media_root / responsive_name(post.image.name, width)) as img:
+            assert (img.format, img.width) == ("JPEG", width)
+        with Image.open(media_root / responsive_name(
+                post.image.name, width, "WEBP")) as img:
+            assert (img.format, img.width) == ("WEBP", width)
+
+
+def test_webp_original_not_duplicated(mixer, published_category):
+    post = _post(mixer, published_category, size=(500, 400),
+                 image_format="WEBP", name="photo.webp")
+    assert post.image_meta["variants"] == {
+        "widths": [320, 500], "formats": []}
+
+
+def test_picture_markup(client, mixer, published_category):
+    post = _post(mixer, published_category)
+    content = client.get("/").content.decode("utf-8")
+    webp_320 = responsive_name(post.image.url, 320, "WEBP")
+    assert f'<source type="image/webp" srcset="{webp_320} 320w, ' in content
+    assert f'srcset="{responsive_name(post.image.url, 320)} 320w, ' in content
+    assert f'src="{post.image_thumb.url}"' in content
+
+
+def test_posts_without_variants_keep_plain_img(
+        client, mixer, published_category, capsys):
+    post = _post(mixer, published_category)
+    meta = post.image_meta
+    del meta["variants"]
+    Post.objects.update(image_meta=meta)
+    content = client.get("/").content.decode("utf-8")
+    assert "<source" not in content and "srcset" not in content
+
+    call_command("generate_thumbnails")
+    assert "Обработано изображений: 1" in capsys.readouterr().out
+    assert "variants" in Post.objects.get().image_meta
+
+
+def test_feed_image_bytes_command(mixer, published_category, capsys):
+    _post(mixer, published_category)
+    call_command("feed_image_bytes", viewport=[(360, 2.0), (1280, 1.0)])
+    output = capsys.readouterr().out
+    assert "изображений: 1" in output
+    assert "360x2:" in output and "1280x1:" in output
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Post
+from blog.scheduling import publish_due_posts, reset_schedule
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1))
+
+
+def test_scheduled_post_hidden_until_promoted(client, scheduled_post):
+    assert not scheduled_post.is_visible
+    assert client.get("/")["X-Cache"] == "MISS"
+    assert client.get("/")["X-Cache"] == "HIT"
+
+    assert publish_due_posts(now=timezone.now() + timedelta(hours=2)) == 1
+    scheduled_post.refresh_from_db()
+    assert scheduled_post.is_visible
+
+    response = client.get("/")
+    assert response["X-Cache"] == "MISS"
+    assert scheduled_post.title in response.content.decode("utf-8")
+
+
+def test_due_post_promoted_on_request(client, scheduled_post):
+    client.get("/")
+    # The post fell due; its stored flag has not been promoted yet.
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1), is_visible=False)
+    reset_schedule()
+    assert scheduled_post.title in client.get("/").content.decode("utf-8")
+
+
+def test_unpublished_post_never_promoted(mixer, published_category):
+    post = mixer.blend(
+        "blog.Post", category=published_category, is_published=False,
+        pub_date=timezone.now() - timedelta(days=1))
+    assert publish_due_posts() == 0
+    post.refresh_from_db()
+    assert not post.is_visible
+
+
+def test_publish_scheduled_command(capsys, scheduled_post):
+    # The post fell due; its stored flag has not been promoted yet.
+    Post.objects.filter(pk=scheduled_post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1), is_visible=False)
+    call_command("publish_scheduled")
+    assert "Опубликовано: 1" in capsys.readouterr().out
+
+
+# Run by the scheduler process in its own database.
+SCHEDULED_POST_SETUP = """
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from blog.models import Category, Post
+call_command("migrate", verbosity=0)
+category = Category.objects.create(
+    title="Категория", description="Описание", slug="scheduled")
+post = Post.objects.create(
+    title="Отложенная", text="Текст", category=category,
+    author=get_user_model().objects.create(username="scheduler"),
+    pub_date=timezone.now() + timedelta(hours=1))
+Post.objects.filter(pk=post.pk).update(
+    pub_date=timezone.now() - timedelta(minutes=1), is_visible=False)
+"""
+
+
+def test_scheduler_process_invalidates_cached_pages(
+        client, manage_in_subprocess, post_with_published_location):
+    manage_in_subprocess("shell", "-c", SCHEDULED_POST_SETUP)
+    assert client.get("/")["X-Cache"] == "MISS"
+    assert client.get("/")["X-Cache"] == "HIT"
+    assert "Опубликовано: 1" in manage_in_subprocess("publish_scheduled")
+    assert client.get("/")["X-Cache"] == "MISS"
@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category):
+    def blend(**kwargs):
+        kwargs.setdefault("is_published", True)
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category, **kwargs)
+    return blend
+
+
+def _found(client, query, **params):
+    response = client.get("/search/", {"q": query, **params})
+    assert response.status_code == 200
+    return response.context["page_obj"]
+
+
+def test_title_matches_rank_first(client, blend_post):
+    in_text = blend_post(title="Заметка", text="Пишу про велосипед.")
+    in_title = blend_post(title="Велосипед", text="Просто текст.")
+    blend_post(title="Другое", text="Ничего общего.")
+    assert [post.id for post in _found(client, "велосипед")] == [
+        in_title.id, in_text.id]
+
+
+def test_prefix_and_all_words(client, blend_post):
+    post = blend_post(title="Летний поход", text="Горы и реки")
+    blend_post(title="Летний отдых", text="Море")
+    assert [p.id for p in _found(client, "летний гор*")] == [post.id]
+    assert len(_found(client, "лет*")) == 2
+    assert len(_found(client, "лет")) == 0
+
+
+def test_hidden_posts_not_found(client, blend_post):
+    blend_post(title="Секрет", is_published=False)
+    assert len(_found(client, "секрет")) == 0
+
+
+def test_index_follows_edits_and_deletes(client, blend_post):
+    post = blend_post(title="Старое название")
+    post.title = "Новое название"
+    post.save()
+    assert len(_found(client, "старое")) == 0
+    assert [p.id for p in _found(client, "новое")] == [post.id]
+    post.delete()
+    assert len(_found(client, "новое")) == 0
+
+
+def test_operators_are_not_interpreted(client, blend_post):
+    blend_post(title="Кошки NOT собаки")
+    assert len(_found(client, 'NOT "собаки" (')) == 1
+    assert _found(client, "!!!").object_list == []
+
+
+def test_keyset_pages_cover_results(client, blend_post):
+    posts = [blend_post(title=f"Пост номер {i}") for i in range(25)]
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = _found(client, "пост", cursor=cursor)
+        seen.extend(post.id for post in page)
+        cursor = page.next_cursor
+    assert sorted(seen) == sorted(post.id for post in posts)
+    assert len(seen) == len(set(seen))
+
+
+def test_rebuild_command(client, blend_post, capsys):
+    post = blend_post(title="Пересборка")
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM blog_post_fts")
+    assert len(_found(client, "пересборка")) == 0
+    call_command("rebuild_search_index", batch_size=1)
+    assert "Проиндексировано публикаций: 1" in capsys.readouterr().out
+    assert [p.id for p in _found(client, "пересборка")] == [post.id]
+    assert Post.objects.count() == 1
+
+
+def test_only_newest_matches_ranked(client, blend_post, monkeypatch):
+    monkeypatch.setattr("blog.search.RANK_WINDOW", 3)
+    older = [blend_post(title="Окно окно", text="Окно") for _ in range(2)]
+    newer = [blend_post(title="Текст", text="Окно") for _ in range(3)]
+    page = _found(client, "окно")
+    assert sorted(p.id for p in page) == [post.id for post in newer]
+    page = _found(client, "окно", cursor=page.next_cursor)
+    assert [p.id for p in page] == [older[1].id, older[0].id]
+    assert page.next_cursor is None
+    page = _found(client, "окно", cursor=page.previous_cursor)
+    assert sorted(p.id for p in page) == [post.id for post in newer]
+
+
+def test_hidden_posts_do_not_fill_rank_window(
+        client, blend_post, monkeypatch):
+    monkeypatch.setattr("blog.search.RANK_WINDOW", 2)
+    visible = [blend_post(title="Окно") for _ in range(2)]
+    blend_post(title="Окно", is_published=False)
+    blend_post(title="Окно", pub_date=timezone.now() + timedelta(days=1))
+    page = _found(client, "окно")
+    assert sorted(p.id for p in page) == [post.id for post in visible]
+    assert page.next_cursor is None
+
+
+def test_matches_past_rank_window_are_paged(client, blend_post, monkeypatch):
+    monkeypatch.setattr("blog.search.RANK_WINDOW", 7)
+    posts = [blend_post(title=f"Пост номер {i}") for i in range(25)]
+    pages, cursor = [], ""
+    while cursor is not None:
+        page = _found(client, "пост", cursor=cursor)
+        pages.append([post.id for post in page])
+        cursor = page.next_cursor
+    seen = [post_id for page in pages for post_id in page]
+    assert sorted(seen) == [post.id for post in posts]
+    assert seen[7:] == [post.id for post in posts[-8::-1]]
+    assert [len(page) for page in pages] == [7, 10, 8]
+    back, cursor = [], page.previous_cursor
+    while cursor is not None:
+        page = _found(client, "пост", cursor=cursor)
+        back.insert(0, [post.id for post in page])
+        cursor = page.previous_cursor
+    assert back == pages[:-1]
+
+
+def test_word_forms_find_each_other(client, blend_post):
+    holiday = blend_post(title="Праздник", text="Ёлка во дворе.")
+    holidays = blend_post(title="Заметка", text="Готовимся к праздникам")
+    assert sorted(p.id for p in _found(client, "праздники")) == [
+        holiday.id, holidays.id]
+    assert [p.id for p in _found(client, "ёлки")] == [holiday.id]
+    assert [p.id for p in _found(client, "ЕЛКОЙ")] == [holiday.id]
+
+
+def test_index_stores_analyzed_text(blend_post):
+    post = blend_post(title="Праздники", text="Весёлые песни")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT title, text FROM blog_post_fts WHERE rowid = %s",
+            [post.id])
+        assert cursor.fetchone() == ("праздник", "весел песн")
+
+
+def test_analyzer_is_pluggable(client, blend_post, settings):
+    settings.BLOG_SEARCH_ANALYZER = "blog.analysis.Analyzer"
+    post = blend_post(title="Праздник")
+    assert len(_found(client, "праздники")) == 0
+    assert [p.id for p in _found(client, "праздник")] == [post.id]
@@ -0,0 +1,110 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from blog.sitemaps import update_sitemaps
+
+pytestmark = [pytest.mark.django_db]
+
+BASE_URL = "http://testserver"
+
+
+@pytest.fixture(autouse=True)
+def sitemap_root(settings, tmp_path):
+    settings.BLOG_SITEMAP_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def blend_post(mixer, user, published_category):
+    def blend(month=1, **kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("category", published_category)
+        return mixer.blend(
+            "blog.Post", author=user,
+            pub_date=datetime(2023, month, 15, tzinfo=timezone.utc),
+            **kwargs)
+    return blend
+
+
+def _files(root):
+    return {path.name for path in root.glob("sitemap*.xml")}
+
+
+def test_index_and_shards(sitemap_root, blend_post, published_category):
+    january, february = blend_post(month=1), blend_post(month=2)
+    hidden = blend_post(month=1, is_published=False)
+    assert update_sitemaps(sitemap_root, BASE_URL) == (4, 0)
+    cid = published_category.id
+    assert _files(sitemap_root) == {
+        "sitemap.xml", "sitemap-categories.xml", "sitemap-profiles-0.xml",
+        f"sitemap-posts-{cid}-2023-01.xml",
+        f"sitemap-posts-{cid}-2023-02.xml"}
+    index = (sitemap_root / "sitemap.xml").read_text()
+    assert f"{BASE_URL}/sitemap-posts-{cid}-2023-02.xml" in index
+    shard = (sitemap_root / f"sitemap-posts-{cid}-2023-01.xml").read_text()
+    assert f"{BASE_URL}/posts/{january.id}/" in shard
+    assert f"/posts/{february.id}/" not in shard
+    assert f"/posts/{hidden.id}/" not in shard
+    category_url = reverse(
+        "blog:category_posts", args=(published_category.slug,))
+    assert category_url in (
+        sitemap_root / "sitemap-categories.xml").read_text()
+    assert f"/profile/{january.author.username}/" in (
+        sitemap_root / "sitemap-profiles-0.xml").read_text()
+
+
+def test_only_touched_shards_rewritten(
+        sitemap_root, blend_post, published_category):
+    january = blend_post(month=1)
+    blend_post(month=2)
+    update_sitemaps(sitemap_root, BASE_URL)
+    assert update_sitemaps(sitemap_root, BASE_URL) == (0, 0)
+
+    february_shard = (
+        sitemap_root / f"sitemap-posts-{published_category.id}-2023-02.xml")
+    february_shard.write_text("untouched")
+    january.title = "Новый заголовок"
+    january.save()
+    # The post shard plus categories and profiles, whose lastmod moved.
+    assert update_sitemaps(sitemap_root, BASE_URL) == (3, 0)
+    assert february_shard.read_text() == "untouched"
+
+
+def test_emptied_shard_removed(sitemap_root, blend_post, published_category):
+    blend_post(month=1)
+    february = blend_post(month=2)
+    update_sitemaps(sitemap_root, BASE_URL)
+    february.is_published = False
+    february.save()
+    assert update_sitemaps(sitemap_root, BASE_URL)[1] == 1
+    name = f"sitemap-posts-{published_category.id}-2023-02.xml"
+    assert name not in _files(sitemap_root)
+    assert name not in (sitemap_root / "sitemap.xml").read_text()
+
+
+def test_large_shard_split(sitemap_root, blend_post, monkeypatch):
+    monkeypatch.setattr("blog.sitemaps.SITEMAP_LIMIT", 2)
+    for _ in range(5):
+        blend_post(month=1)
+    update_sitemaps(sitemap_root, BASE_URL)
+    assert len([
+        name for name in _files(sitemap_root) if "posts" in name]) == 3
+    monkeypatch.setattr("blog.sitemaps.SITEMAP_LIMIT", 10)
+    update_sitemaps(sitemap_root, BASE_URL, full=True)
+    assert len([
+        name for name in _files(sitemap_root) if "posts" in name]) == 1
+
+
+def test_command_and_view(client, blend_post, capsys):
+    blend_post()
+    assert client.get("/sitemap.xml").status_code == 404
+    call_command("update_sitemaps", base_url=BASE_URL)
+    assert "Обновлено частей карты сайта: 3" in capsys.readouterr().out
+    response = client.get("/sitemap.xml")
+    assert response.status_code == 200
+    assert b"sitemap-categories.xml" in b"".join(response.streaming_content)
+    assert client.get("/sitemap-categories.xml").status_code == 200
+    assert client.get("/sitemap-../manifest.json").status_code == 404
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _visible_ids():
+    return set(
+        Post.objects.filter(is_visible=True).values_list("pk", flat=True))
+
+
+def test_category_toggle_propagates(
+        client, published_category, post_with_published_location):
+    post = post_with_published_location
+    assert _visible_ids() == {post.pk}
+
+    published_category.is_published = False
+    published_category.save()
+    assert _visible_ids() == set()
+    assert client.get(f"/posts/{post.pk}/").status_code == 404
+
+    published_category.is_published = True
+    published_category.save()
+    assert _visible_ids() == {post.pk}
+    assert client.get(f"/posts/{post.pk}/").status_code == 200
+
+
+def test_category_toggle_keeps_unpublished_hidden(
+        mixer, published_category):
+    post = mixer.blend(
+        "blog.Post", category=published_category, is_published=False)
+    published_category.is_published = False
+    published_category.save()
+    published_category.is_published = True
+    published_category.save()
+    post.refresh_from_db()
+    assert not post.is_visible
+
+
+def test_category_delete_hides_posts(
+        published_category, post_with_published_location):
+    published_category.delete()
+    assert _visible_ids() == set()
+
+
+def test_index_query_does_not_filter_on_category(
+        client, post_with_published_location):
+    response = client.get("/")
+    sql = str(response.context["page_obj"].paginator.object_list.query)
+    where = sql.split(" WHERE ", 1)[1]
+    assert '"blog_category"' not in where
+
+
+def test_partial_save_recomputes_visibility(post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save(update_fields=["is_published"])
+    assert _visible_ids() == set()
+    post.is_published = True
+    post.save(update_fields=("is_published",))
+    assert _visible_ids() == {post.pk}
+
+
+def test_queryset_update_recomputes_visibility(
+        mixer, published_category, post_with_published_location):
+    post = post_with_published_location
+    hidden = mixer.blend("blog.Category", is_published=False)
+    Post.objects.filter(pk=post.pk).update(is_published=False)
+    assert _visible_ids() == set()
+    Post.objects.filter(is_published=False).update(is_published=True)
+    assert _visible_ids() == {post.pk}
+    Post.objects.update(category=hidden)
+    assert _visible_ids() == set()
+    Post.objects.update(category_id=published_category.pk)
+    assert _visible_ids() == {post.pk}
+    Post.objects.update(pub_date=timezone.now() + timedelta(days=1))
+    assert _visible_ids() == set()